@@ -1,17 +1,168 @@
 """
 Hyperliquid market data service using CCXT
 """
+import asyncio
+import functools
 import ccxt
+import ccxt.async_support as ccxt_async
 import logging
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timezone
+import os
+from typing import Dict, List, Any, Optional, Tuple
 import time
-import pandas as pd
-import json
-from stockstats import StockDataFrame
+from collections import OrderedDict
+import numpy as np
+import indicators
 
 logger = logging.getLogger(__name__)
 
+# Mainstream cryptos trade as perpetual swaps, everything else as spot
+PERP_SYMBOLS = frozenset({'BTC', 'ETH', 'SOL', 'DOGE', 'BNB', 'XRP'})
+
+# Map period to CCXT timeframe
+_TIMEFRAME_MAP = {
+    '1m': '1m',
+    '3m': '3m',
+    '5m': '5m',
+    '15m': '15m',
+    '30m': '30m',
+    '1h': '1h',
+    '4h': '4h',
+    '1d': '1d',
+}
+# Frequencies accepted by the symbol_data_provider_json entry points
+_PERIOD_MAP = {'1m': '1m', '3m': '3m', '5m': '5m', '1h': '1h', '4h': '4h', '1d': '1d'}
+
+# Hyperliquid's candleSnapshot only serves the most recent 5000 candles of a
+# timeframe; anything older is not available at all
+HYPERLIQUID_OHLCV_MAX = 5000
+
+# OHLCV response cache: repeated requests within a short window (and within
+# the same candle) reuse the last response instead of another round-trip
+OHLCV_CACHE_TTL_SECONDS = 5.0
+OHLCV_CACHE_MAX_SIZE = 256
+_TIMEFRAME_SECONDS = {'1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '4h': 14400, '1d': 86400}
+_ohlcv_cache: 'OrderedDict[Tuple[str, str, int, int], Tuple[float, np.ndarray]]' = OrderedDict()
+# Latest close per formatted symbol from the most recent OHLCV fetch: (fetched_at, price)
+_last_close: Dict[str, Tuple[float, float]] = {}
+
+# Transient errors (rate limits, timeouts, DDoS protection) are retried with
+# exponential backoff: 0.5s, 1s, 2s between the attempts
+OHLCV_RETRY_ATTEMPTS = 4
+OHLCV_RETRY_BASE_DELAY = 0.5
+
+# Last good OHLCV response per (symbol, timeframe), used when all retries fail.
+# Kept in a per-user cache dir (not a shared temp dir other users could plant files in)
+OHLCV_SNAPSHOT_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'alpha_arena_ohlcv',
+)
+OHLCV_SNAPSHOT_MAX_AGE_SECONDS = 3600
+# Last candles written per snapshot path, so unchanged responses are not rewritten
+_saved_snapshots: Dict[str, np.ndarray] = {}
+
+# First exchange instance with loaded markets; later instances copy from it
+# instead of re-downloading the markets metadata
+_markets_source = None
+
+
+def _share_markets(exchange) -> None:
+    """Seed an exchange with already loaded markets, or remember it once it has loaded them"""
+    global _markets_source
+    if exchange.markets:
+        if _markets_source is None:
+            _markets_source = exchange
+    elif _markets_source is not None:
+        try:
+            exchange.set_markets_from_exchange(_markets_source)
+        except Exception as e:
+            # Fall back to letting this instance load its own markets
+            logger.warning(f"Could not reuse loaded markets: {e}")
+            exchange.markets = None
+            exchange.markets_by_id = None
+
+
+def _snapshot_path(symbol: str, timeframe: str) -> str:
+    safe_symbol = symbol.replace('/', '_').replace(':', '_')
+    return os.path.join(OHLCV_SNAPSHOT_DIR, f"{safe_symbol}_{timeframe}.npy")
+
+
+def _save_ohlcv_snapshot(symbol: str, timeframe: str, candles: np.ndarray) -> None:
+    """Persist the last good response if it changed; failures here never affect the fetch"""
+    path = _snapshot_path(symbol, timeframe)
+    saved = _saved_snapshots.get(path)
+    if saved is not None and np.array_equal(saved, candles):
+        return
+    try:
+        os.makedirs(OHLCV_SNAPSHOT_DIR, mode=0o700, exist_ok=True)
+        np.save(path, candles)
+        _saved_snapshots[path] = candles
+    except OSError as e:
+        logger.warning(f"Could not save OHLCV snapshot for {symbol}: {e}")
+
+
+def _load_ohlcv_snapshot(symbol: str, timeframe: str, count: int) -> Optional[np.ndarray]:
+    """Load the last good response if it exists and is recent enough to trade on"""
+    path = _snapshot_path(symbol, timeframe)
+    try:
+        if time.time() - os.path.getmtime(path) > OHLCV_SNAPSHOT_MAX_AGE_SECONDS:
+            return None
+        candles = np.load(path)
+    except (OSError, ValueError):
+        return None
+    logger.warning(f"Using OHLCV snapshot from disk for {symbol} {timeframe}")
+    return candles[-count:]
+
+
+def _clamp_ohlcv_count(symbol: str, count: int) -> int:
+    """Limit a request to the candles Hyperliquid can actually serve"""
+    if count > HYPERLIQUID_OHLCV_MAX:
+        logger.warning(f"Requested {count} klines for {symbol}; Hyperliquid serves only the latest {HYPERLIQUID_OHLCV_MAX}")
+        return HYPERLIQUID_OHLCV_MAX
+    return count
+
+
+def _ohlcv_to_array(rows: List[List[float]]) -> np.ndarray:
+    """Exchange rows as one (n, 6) float64 array"""
+    return np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+
+
+def _ohlcv_cache_key(symbol: str, timeframe: str, count: int) -> Tuple[str, str, int, int]:
+    """Cache key including the candle bucket, so a new bar always refetches"""
+    bucket = int(time.time() // _TIMEFRAME_SECONDS.get(timeframe, 60))
+    return (symbol, timeframe, count, bucket)
+
+
+def _ohlcv_cache_get(key: Tuple[str, str, int, int]) -> Optional[np.ndarray]:
+    """Return cached candles if still fresh"""
+    entry = _ohlcv_cache.get(key)
+    if entry is None:
+        return None
+    fetched_at, candles = entry
+    if time.monotonic() - fetched_at > OHLCV_CACHE_TTL_SECONDS:
+        del _ohlcv_cache[key]
+        return None
+    _ohlcv_cache.move_to_end(key)
+    return candles
+
+
+def _ohlcv_cache_put(key: Tuple[str, str, int, int], candles: np.ndarray) -> None:
+    """Store candles, evicting the least recently used entries beyond the max size"""
+    candles.setflags(write=False)  # shared between callers
+    fetched_at = time.monotonic()
+    _ohlcv_cache[key] = (fetched_at, candles)
+    last_close = float(candles[-1, 4])
+    if last_close > 0:
+        _last_close[key[0]] = (fetched_at, last_close)
+    _ohlcv_cache.move_to_end(key)
+    while len(_ohlcv_cache) > OHLCV_CACHE_MAX_SIZE:
+        _ohlcv_cache.popitem(last=False)
+
+
+def _nullable(values: np.ndarray) -> List[Optional[float]]:
+    """Convert a float column to a list, mapping zero/NaN to None"""
+    return [v if v and v == v else None for v in values.tolist()]
+
+
 class HyperliquidClient:
     def __init__(self):
         self.exchange = None
@@ -38,7 +189,14 @@ class HyperliquidClient:
             # Ensure symbol is in CCXT format (e.g., 'BTC/USD')
             formatted_symbol = self._format_symbol(symbol)
             
+            # A kline fetch moments ago already carries the latest price
+            cached_price = self.last_price_from_ohlcv_cache(symbol)
+            if cached_price is not None:
+                return cached_price
+            
+            _share_markets(self.exchange)
             ticker = self.exchange.fetch_ticker(formatted_symbol)
+            _share_markets(self.exchange)
             price = ticker['last']
             
             logger.info(f"Got price for {formatted_symbol}: {price}")
@@ -48,65 +206,96 @@ class HyperliquidClient:
             logger.error(f"Error fetching price for {symbol}: {e}")
             return None
 
-    def get_kline_data(self, symbol: str, period: str = '1d', count: int = 100) -> List[Dict[str, Any]]:
-        """Get kline/candlestick data for a symbol"""
+    def last_price_from_ohlcv_cache(self, symbol: str) -> Optional[float]:
+        """Close of the latest candle from a recent OHLCV fetch, or None if stale or missing"""
+        entry = _last_close.get(self._format_symbol(symbol))
+        if entry is None:
+            return None
+        fetched_at, price = entry
+        if time.monotonic() - fetched_at > OHLCV_CACHE_TTL_SECONDS:
+            return None
+        return price
+
+    def get_ohlcv_array(self, symbol: str, period: str = '1d', count: int = 100) -> np.ndarray:
+        """Get raw candles as an (n, 6) float64 array: timestamp_ms, open, high, low, close, volume"""
         try:
             if not self.exchange:
                 self._initialize_exchange()
             
             formatted_symbol = self._format_symbol(symbol)
             
-            # Map period to CCXT timeframe
-            timeframe_map = {
-                '1m': '1m',
-                '3m': '3m',
-                '5m': '5m', 
-                '15m': '15m',
-                '30m': '30m',
-                '1h': '1h',
-                '4h': '4h',
-                '1d': '1d',
-            }
-            timeframe = timeframe_map.get(period, '1d')
+            timeframe = self._to_timeframe(period)
+            count = _clamp_ohlcv_count(formatted_symbol, count)
             
-            # Fetch OHLCV data
-            ohlcv = self.exchange.fetch_ohlcv(formatted_symbol, timeframe, limit=count)
+            cache_key = _ohlcv_cache_key(formatted_symbol, timeframe, count)
+            candles = _ohlcv_cache_get(cache_key)
+            if candles is not None:
+                return candles
             
-            # Convert to our format
-            klines = []
-            for candle in ohlcv:
-                timestamp_ms = candle[0]
-                open_price = candle[1]
-                high_price = candle[2]
-                low_price = candle[3]
-                close_price = candle[4]
-                volume = candle[5]
-                
-                # Calculate change
-                change = close_price - open_price if open_price else 0
-                percent = (change / open_price * 100) if open_price else 0
-                
-                klines.append({
-                    'timestamp': int(timestamp_ms / 1000),  # Convert to seconds
-                    'datetime_str': datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).isoformat(),
-                    'open': float(open_price) if open_price else None,
-                    'high': float(high_price) if high_price else None,
-                    'low': float(low_price) if low_price else None,
-                    'close': float(close_price) if close_price else None,
-                    'volume': float(volume) if volume else None,
-                    'amount': float(volume * close_price) if volume and close_price else None,
-                    'change': float(change),
-                    'percent': float(percent),
-                })
+            # Fetch OHLCV data
+            _share_markets(self.exchange)
+            candles = _ohlcv_to_array(self._fetch_ohlcv_with_retry(formatted_symbol, timeframe, count))
+            _share_markets(self.exchange)
+            if len(candles):
+                _ohlcv_cache_put(cache_key, candles)
+                _save_ohlcv_snapshot(formatted_symbol, timeframe, candles)
             
-            logger.info(f"Got {len(klines)} klines for {formatted_symbol}")
-            return klines
+            logger.info(f"Got {len(candles)} klines for {formatted_symbol}")
+            return candles
             
         except Exception as e:
             logger.error(f"Error fetching klines for {symbol}: {e}")
-            return []
+            snapshot = _load_ohlcv_snapshot(self._format_symbol(symbol), self._to_timeframe(period), count)
+            return snapshot if snapshot is not None else np.empty((0, 6), dtype=np.float64)
+
+    def _fetch_ohlcv_with_retry(self, formatted_symbol: str, timeframe: str, limit: int) -> List[List[float]]:
+        """fetch_ohlcv with exponential backoff on transient network errors"""
+        for attempt in range(OHLCV_RETRY_ATTEMPTS):
+            try:
+                return self.exchange.fetch_ohlcv(formatted_symbol, timeframe, limit=limit)
+            except ccxt.NetworkError as e:
+                if attempt == OHLCV_RETRY_ATTEMPTS - 1:
+                    raise
+                delay = OHLCV_RETRY_BASE_DELAY * 2 ** attempt
+                logger.warning(f"Retrying klines for {formatted_symbol} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def get_kline_data(self, symbol: str, period: str = '1d', count: int = 100) -> List[Dict[str, Any]]:
+        """Get kline/candlestick data for a symbol"""
+        candles = self.get_ohlcv_array(symbol, period=period, count=count)
+        
+        # Convert to our format, column-wise instead of per candle
+        timestamp_ms, open_, high, low, close, volume = candles.T
+        
+        # Calculate change
+        has_open = (open_ != 0) & ~np.isnan(open_)
+        change = np.where(has_open, close - open_, 0.0)
+        percent = np.zeros_like(change)
+        np.divide(change, open_, out=percent, where=has_open)
+        percent *= 100.0
+        
+        columns = {
+            'timestamp': (timestamp_ms // 1000).astype(np.int64).tolist(),  # Convert to seconds
+            'datetime_str': np.char.add(np.datetime_as_string(timestamp_ms.astype('datetime64[ms]'), unit='s'), '+00:00').tolist(),
+            'open': _nullable(open_),
+            'high': _nullable(high),
+            'low': _nullable(low),
+            'close': _nullable(close),
+            'volume': _nullable(volume),
+            'amount': _nullable(volume * close),
+            'change': change.tolist(),
+            'percent': percent.tolist(),
+        }
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
 
-    def _format_symbol(self, symbol: str) -> str:
+    @staticmethod
+    def _to_timeframe(period: str) -> str:
+        """Map period to CCXT timeframe"""
+        return _TIMEFRAME_MAP.get(period, '1d')
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _format_symbol(symbol: str) -> str:
         """Format symbol for CCXT (e.g., 'BTC' -> 'BTC/USDC:USDC')"""
         if '/' in symbol and ':' in symbol:
             return symbol
@@ -116,9 +305,8 @@ class HyperliquidClient:
         
         # For single symbols like 'BTC', check if it's a mainstream crypto
         symbol_upper = symbol.upper()
-        mainstream_cryptos = ['BTC', 'ETH', 'SOL', 'DOGE', 'BNB', 'XRP']
         
-        if symbol_upper in mainstream_cryptos:
+        if symbol_upper in PERP_SYMBOLS:
             # Use perpetual swap format for mainstream cryptos
             return f"{symbol_upper}/USDC:USDC"
         else:
@@ -126,65 +314,167 @@ class HyperliquidClient:
             return f"{symbol_upper}/USDC"
 
 
+class AsyncHyperliquidClient:
+    """Hyperliquid client on ccxt.async_support, for fetching many symbols concurrently"""
+    
+    def __init__(self):
+        self.exchange = ccxt_async.hyperliquid({
+            'sandbox': False,  # Set to True for testnet
+            'enableRateLimit': True,  # CCXT throttler queues concurrent requests
+        })
+    
+    async def get_ohlcv_array(self, symbol: str, period: str = '1d', count: int = 100) -> np.ndarray:
+        """Get raw candles as an (n, 6) float64 array, see HyperliquidClient.get_ohlcv_array"""
+        try:
+            formatted_symbol = HyperliquidClient._format_symbol(symbol)
+            timeframe = HyperliquidClient._to_timeframe(period)
+            count = _clamp_ohlcv_count(formatted_symbol, count)
+            
+            cache_key = _ohlcv_cache_key(formatted_symbol, timeframe, count)
+            candles = _ohlcv_cache_get(cache_key)
+            if candles is not None:
+                return candles
+            
+            _share_markets(self.exchange)
+            candles = _ohlcv_to_array(await self._fetch_ohlcv_with_retry(formatted_symbol, timeframe, count))
+            _share_markets(self.exchange)
+            if len(candles):
+                _ohlcv_cache_put(cache_key, candles)
+                # File I/O in a worker thread, not on the event loop
+                await asyncio.to_thread(_save_ohlcv_snapshot, formatted_symbol, timeframe, candles)
+            
+            logger.info(f"Got {len(candles)} klines for {formatted_symbol}")
+            return candles
+            
+        except Exception as e:
+            logger.error(f"Error fetching klines for {symbol}: {e}")
+            snapshot = await asyncio.to_thread(
+                _load_ohlcv_snapshot,
+                HyperliquidClient._format_symbol(symbol), HyperliquidClient._to_timeframe(period), count
+            )
+            return snapshot if snapshot is not None else np.empty((0, 6), dtype=np.float64)
+    
+    async def _fetch_ohlcv_with_retry(self, formatted_symbol: str, timeframe: str, limit: int) -> List[List[float]]:
+        """fetch_ohlcv with exponential backoff on transient network errors"""
+        for attempt in range(OHLCV_RETRY_ATTEMPTS):
+            try:
+                return await self.exchange.fetch_ohlcv(formatted_symbol, timeframe, limit=limit)
+            except ccxt.NetworkError as e:
+                if attempt == OHLCV_RETRY_ATTEMPTS - 1:
+                    raise
+                delay = OHLCV_RETRY_BASE_DELAY * 2 ** attempt
+                logger.warning(f"Retrying klines for {formatted_symbol} in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+    
+    async def get_ohlcv_batch(self, symbols: List[str], period: str = '1d', count: int = 100) -> Dict[str, np.ndarray]:
+        """Fetch candles for all symbols concurrently; wall time is the slowest request, not the sum"""
+        results = await asyncio.gather(*[self.get_ohlcv_array(symbol, period, count) for symbol in symbols])
+        return dict(zip(symbols, results))
+    
+    async def close(self) -> None:
+        """Close the underlying HTTP session"""
+        await self.exchange.close()
+
+
+# Global client instance, created on first use so importing this module stays cheap
+_client: Optional[HyperliquidClient] = None
+
+
+def _get_client() -> HyperliquidClient:
+    """Return the shared HyperliquidClient, creating it on first call"""
+    global _client
+    if _client is None:
+        _client = HyperliquidClient()
+    return _client
+
+
 def symbol_data_provider_json(symbol: str, frequency: str, count: int) -> Dict[str, Any]:
     """Get comprehensive market data for a symbol"""
-    client = HyperliquidClient()
+    client = _get_client()
     
-    period_map = {'1m': '1m', '3m': '3m', '5m': '5m', '1h': '1h', '4h': '4h', '1d': '1d'}
-    timeframe = period_map.get(frequency, frequency)
+    timeframe = _PERIOD_MAP.get(frequency, frequency)
     
-    klines = client.get_kline_data(symbol, period=timeframe, count=count)
-    print(f"Got {len(klines)} klines for {symbol} {frequency} {count}")
-    if not klines:
-        return {}
+    candles = client.get_ohlcv_array(symbol, period=timeframe, count=count)
+    print(f"Got {len(candles)} klines for {symbol} {frequency} {count}")
+    return _market_data_from_candles(candles, count)
+
+
+async def symbol_data_provider_json_async(client: AsyncHyperliquidClient, symbols: List[str], frequency: str, count: int) -> Dict[str, Dict[str, Any]]:
+    """Get market data for several symbols concurrently on a caller-owned client
     
-    df = pd.DataFrame(klines)
-    df['datetime'] = pd.to_datetime(df['datetime_str'])
-    df = df.set_index('datetime')
+    Keeping one client open across loop iterations reuses its HTTP session and
+    loaded markets instead of reconnecting every call.
+    """
+    timeframe = _PERIOD_MAP.get(frequency, frequency)
     
-    stock = StockDataFrame.retype(df[['open', 'high', 'low', 'close', 'volume']])
+    candles_by_symbol = await client.get_ohlcv_batch(symbols, period=timeframe, count=count)
+    return _market_data_by_symbol(candles_by_symbol, frequency, count)
+
+
+def _market_data_by_symbol(candles_by_symbol: Dict[str, np.ndarray], frequency: str, count: int) -> Dict[str, Dict[str, Any]]:
+    """Market data dict per symbol from fetched candles"""
+    results = {}
+    for symbol, candles in candles_by_symbol.items():
+        print(f"Got {len(candles)} klines for {symbol} {frequency} {count}")
+        results[symbol] = _market_data_from_candles(candles, count)
+    return results
+
+
+def _market_data_from_candles(candles: np.ndarray, count: int) -> Dict[str, Any]:
+    """Compute indicators and summary fields from an (n, 6) OHLCV array
+    
+    Scalars are Python floats; series (mid_prices, *_array) are float64 ndarrays,
+    converted to lists only where they are serialized.
+    """
+    if not len(candles):
+        return {}
     
-    stock['rsi_7']
-    stock['rsi_14']
-    stock['macd']
-    stock['macds']
-    stock['close_20_ema']
-    stock['atr_3']
-    stock['atr_14']
-    stock['close_50_ema']
+    # Work on the float64 columns directly, no DataFrame in between
+    high = candles[:, 2]
+    low = candles[:, 3]
+    close = candles[:, 4]
+    volume = candles[:, 5]
     
-    latest = stock.tail(1)
-    past_10 = stock.tail(count)
+    rsi_7 = indicators.rsi(close, 7)
+    rsi_14 = indicators.rsi(close, 14)
+    # One pass over close for every EMA period; MACD = EMA12 - EMA26
+    close_emas = indicators.emas(close, (12, 20, 26, 50))
+    macd = close_emas[12] - close_emas[26]
+    close_20_ema = close_emas[20]
+    close_50_ema = close_emas[50]
+    atr_3 = indicators.atr(high, low, close, 3)
+    atr_14 = indicators.atr(high, low, close, 14)
     
-    mid_prices = ((past_10['high'] + past_10['low']) / 2).tolist()
+    past = slice(-count, None)
+    mid_prices = (high[past] + low[past]) * 0.5
+    ema_20_series = close_20_ema[past]
+    current_volume = float(volume[-1])
+    average_volume = float(volume[past].mean())
     
     result = {
-        'current_price': float(latest['close'].iloc[0]),
-        'current_close_20_ema': float(latest['close_20_ema'].iloc[0]),
-        'current_macd': float(latest['macd'].iloc[0]),
-        'current_rsi_7': float(latest['rsi_7'].iloc[0]),
-        'current_volume': float(latest['volume'].iloc[0]),
-        'average_volume': float(past_10['volume'].mean()),
-        'open_interest_latest': float(latest['volume'].iloc[0]),
-        'open_interest_average': float(past_10['volume'].mean()),
+        'current_price': float(close[-1]),
+        'current_close_20_ema': float(close_20_ema[-1]),
+        'current_macd': float(macd[-1]),
+        'current_rsi_7': float(rsi_7[-1]),
+        'current_volume': current_volume,
+        'average_volume': average_volume,
+        'open_interest_latest': current_volume,
+        'open_interest_average': average_volume,
         'funding_rate': 0.0,
         'mid_prices': mid_prices,
-        'ema_close_20_array': past_10['close_20_ema'].tolist(),
-        'macd_array': past_10['macd'].tolist(),
-        'rsi_7_array': past_10['rsi_7'].tolist(),
-        'rsi_14_array': past_10['rsi_14'].tolist(),
-        'ema_20_array': past_10['close_20_ema'].tolist(),
-        'ema_50_array': past_10['close_50_ema'].tolist(),
-        'atr_3_array': past_10['atr_3'].tolist(),
-        'atr_14_array': past_10['atr_14'].tolist()
+        'ema_close_20_array': ema_20_series,
+        'macd_array': macd[past],
+        'rsi_7_array': rsi_7[past],
+        'rsi_14_array': rsi_14[past],
+        'ema_20_array': ema_20_series,
+        'ema_50_array': close_50_ema[past],
+        'atr_3_array': atr_3[past],
+        'atr_14_array': atr_14[past]
     }
     
     return result
 
-# Global client instance
-hyperliquid_client = HyperliquidClient()
-
 
 def get_last_price_from_hyperliquid(symbol: str) -> Optional[float]:
     """Get last price from Hyperliquid"""
-    return hyperliquid_client.get_last_price(symbol)
+    return _get_client().get_last_price(symbol)
@@ -0,0 +1,131 @@
+"""
+Technical indicator kernels on float64 NumPy arrays (EMA, SMMA, RSI, ATR, MACD)
+
+Semantics match stockstats: EMA/SMMA are adjusted exponential averages valid
+from the first candle, so short kline windows still produce values.
+
+With numba installed the kernels are compiled eagerly for explicit float64
+signatures at import (and cached on disk), so the first call inside the
+trading loop does not pay JIT compilation.
+"""
+from typing import Dict, Sequence, Tuple
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, fall back to plain Python loops
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit('float64[:](float64[:], float64)', cache=True)
+def _ewma_adjusted(values: np.ndarray, alpha: float) -> np.ndarray:
+    """Single-pass adjusted EWMA (pandas ewm(adjust=True).mean())"""
+    n = values.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    decay = 1.0 - alpha
+    num = 0.0
+    den = 0.0
+    for i in range(n):
+        num = values[i] + decay * num
+        den = 1.0 + decay * den
+        out[i] = num / den
+    return out
+
+
+@njit('float64[:, :](float64[:], float64[:])', cache=True)
+def _ewma_adjusted_multi(values: np.ndarray, alphas: np.ndarray) -> np.ndarray:
+    """Several adjusted EWMAs of the same series in one pass, one row per alpha"""
+    k = alphas.shape[0]
+    n = values.shape[0]
+    out = np.empty((k, n), dtype=np.float64)
+    decay = 1.0 - alphas
+    num = np.zeros(k, dtype=np.float64)
+    den = np.zeros(k, dtype=np.float64)
+    for i in range(n):
+        x = values[i]
+        for j in range(k):
+            num[j] = x + decay[j] * num[j]
+            den[j] = 1.0 + decay[j] * den[j]
+            out[j, i] = num[j] / den[j]
+    return out
+
+
+@njit('float64[:](float64[:], int64)', cache=True)
+def _rsi_kernel(close: np.ndarray, period: int) -> np.ndarray:
+    """RSI with Wilder smoothing over up/down moves"""
+    n = close.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return out
+    decay = 1.0 - 1.0 / period
+    up_num = 0.0
+    down_num = 0.0
+    for i in range(n):
+        diff = close[i] - close[i - 1] if i > 0 else 0.0
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else 0.0
+        up_num = up + decay * up_num
+        down_num = down + decay * down_num
+        total = up_num + down_num
+        out[i] = 100.0 * up_num / total if total != 0 else 50.0
+    out[0] = 50.0
+    return out
+
+
+@njit('float64[:](float64[:], float64[:], float64[:])', cache=True)
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range, using the first close as the previous close of candle 0"""
+    n = close.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        prev_close = close[i - 1] if i > 0 else close[0]
+        tr = max(high[i] - low[i], abs(high[i] - prev_close), abs(low[i] - prev_close))
+        out[i] = tr if tr == tr else 0.0
+    return out
+
+
+def _as_float64(values) -> np.ndarray:
+    """Writable float64 array matching the compiled kernel signatures (copies only if needed)"""
+    return np.require(values, dtype=np.float64, requirements=['W'])
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """Exponential moving average (span = period)"""
+    return _ewma_adjusted(_as_float64(values), 2.0 / (period + 1))
+
+
+def emas(values: np.ndarray, periods: Sequence[int]) -> Dict[int, np.ndarray]:
+    """Exponential moving averages for several periods, sharing a single pass over values"""
+    alphas = np.array([2.0 / (period + 1) for period in periods], dtype=np.float64)
+    rows = _ewma_adjusted_multi(_as_float64(values), alphas)
+    return dict(zip(periods, rows))
+
+
+def smma(values: np.ndarray, period: int) -> np.ndarray:
+    """Smoothed (Wilder) moving average (alpha = 1 / period)"""
+    return _ewma_adjusted(_as_float64(values), 1.0 / period)
+
+
+def rsi(close: np.ndarray, period: int) -> np.ndarray:
+    """Relative Strength Index"""
+    return _rsi_kernel(_as_float64(close), period)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """Average True Range"""
+    tr = _true_range(
+        _as_float64(high),
+        _as_float64(low),
+        _as_float64(close),
+    )
+    return _ewma_adjusted(tr, 1.0 / period)
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray]:
+    """MACD line (EMA fast - EMA slow) and its signal line"""
+    by_period = emas(close, (fast, slow))
+    macd_line = by_period[fast] - by_period[slow]
+    return macd_line, ema(macd_line, signal)
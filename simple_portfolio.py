@@ -1,13 +1,106 @@
 """
 Simple Portfolio Tracker - One position per symbol
 """
-import json
-from typing import List, Dict, Optional, Any, Tuple
+import operator
+import os
+import stat
+import time
+import orjson
+from typing import Dict, Optional, Any, Tuple, ValuesView
 from datetime import datetime
+from enum import IntEnum
+
+
+def write_file_atomic(filename: str, payload: bytes) -> None:
+    """Write bytes to a temp file next to filename, fsync it, then rename it into place"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    tmp_path = os.path.join(directory, f".tmp_{os.urandom(8).hex()}.json")
+    # Mode 0666 is narrowed by the umask, as for a plain open(); O_EXCL never reuses a file
+    fd = os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            try:
+                # Keep the permissions of the file being replaced
+                os.fchmod(f.fileno(), stat.S_IMODE(os.stat(filename).st_mode))
+            except FileNotFoundError:
+                pass
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class Signal(IntEnum):
+    """Trading signals accepted by SimplePortfolio.execute_decision"""
+    HOLD = 0
+    BUY = 1
+    SELL = 2
+    CLOSE = 3
+
+
+_SIGNALS = {'hold': Signal.HOLD, 'buy': Signal.BUY, 'sell': Signal.SELL, 'close': Signal.CLOSE}
+
+
+def _to_signal(signal: Any) -> Optional[Signal]:
+    """Map a signal string (any case) or Signal to a Signal; None if unknown"""
+    if isinstance(signal, Signal):
+        return signal
+    if not signal:
+        return Signal.HOLD
+    # Canonical lowercase strings skip .lower()
+    sig = _SIGNALS.get(signal)
+    if sig is None:
+        sig = _SIGNALS.get(signal.lower())
+    return sig
+
+# Block layout for SimplePortfolio.decisions_display
+_DECISION_FMT = (
+    "\n{symbol} Trading Decision:\n"
+    "  Signal: {signal}\n"
+    "  Quantity: {quantity}\n"
+    "  Entry Price: ${entry_price:.2f}\n"
+    "  Profit Target: ${profit_target}\n"
+    "  Stop Loss: ${stop_loss}\n"
+    "  Leverage: {leverage}x\n"
+    "  Confidence: {confidence}\n"
+    "  Risk: ${risk_usd}\n"
+    "  Invalidation: {invalidation_condition}"
+)
+
+# Row layout for SimplePortfolio.display
+_DISPLAY_ROW_FMT = "{sym:<10} {qty:<10.4f} ${entry:<9.2f} ${cur:<9.2f} {pnl_str:<10} {lev}x"
+
+
+def _read_only(slot: str, doc: str) -> property:
+    """Getter-only property over a slot"""
+    return property(operator.attrgetter(slot), doc=doc)
 
 
 class Position:
-    """Simple position tracking - one per symbol"""
+    """Simple position tracking - one per symbol
+    
+    Everything except the mark price is read-only: collateral, PnL and the
+    cached dicts are derived from it once, so a changed order is a new Position.
+    """
+    
+    __slots__ = (
+        '_symbol', '_quantity', '_entry_price', '_current_price', '_liquidation_price',
+        '_leverage', '_entry_ts', '_entry_time', '_profit_target', '_stop_loss',
+        '_confidence', '_abs_qty', '_collateral', '_qty_lev', '_last_pnl',
+        '_dict_cache', '_json_cache', '_static_json',
+    )
+    
+    symbol = _read_only('_symbol', "Traded symbol")
+    quantity = _read_only('_quantity', "Signed size: positive long, negative short")
+    entry_price = _read_only('_entry_price', "Fill price of the order")
+    liquidation_price = _read_only('_liquidation_price', "Liquidation price, if leveraged")
+    leverage = _read_only('_leverage', "Leverage multiplier")
+    profit_target = _read_only('_profit_target', "Take-profit price, if any")
+    stop_loss = _read_only('_stop_loss', "Stop-loss price, if any")
+    confidence = _read_only('_confidence', "Decision confidence 0-1")
     
     def __init__(
         self,
@@ -19,19 +112,57 @@ class Position:
         leverage: float = 1.0,
         profit_target: Optional[float] = None,
         stop_loss: Optional[float] = None,
-        confidence: float = 0.5
+        confidence: float = 0.5,
+        entry_time: Optional[str] = None
     ):
-        self.symbol = symbol
-        self.quantity = quantity
-        self.entry_price = entry_price
+        self._symbol = symbol
+        self._quantity = quantity
+        self._entry_price = entry_price
+        self._liquidation_price = liquidation_price
+        self._leverage = leverage
+        # Only the raw clock is read here; the ISO string is formatted on first access
+        self._entry_ts = time.time() if entry_time is None else None
+        self._entry_time = entry_time
+        self._profit_target = profit_target
+        self._stop_loss = stop_loss
+        self._confidence = confidence
+        # Derived scalars; the fields above are read-only, so compute once
+        self._abs_qty = abs(quantity)
+        self._collateral = self._abs_qty * entry_price / leverage
+        # sign(q) * |q| == q, so PnL needs no direction branch
+        self._qty_lev = quantity * leverage
+        self._static_json = None
+        # Setting the price also refreshes the cached unrealized PnL and resets the dict caches
         self.current_price = current_price or entry_price
-        self.liquidation_price = liquidation_price
-        self.leverage = leverage
-        self.entry_time = datetime.now().isoformat()
-        self.profit_target = profit_target
-        self.stop_loss = stop_loss
-        self.confidence = confidence
         
+    @property
+    def current_price(self) -> float:
+        """Mark price; setting it refreshes the cached PnL and drops the cached dicts.
+        
+        Go through SimplePortfolio.update_price/update_all_prices: setting it
+        directly leaves the portfolio's running total PnL out of sync.
+        """
+        return self._current_price
+    
+    @current_price.setter
+    def current_price(self, value: float) -> None:
+        self._current_price = value
+        self._last_pnl = (value - self._entry_price) * self._qty_lev
+        self._dict_cache = None
+        self._json_cache = None
+    
+    @property
+    def entry_time(self) -> str:
+        """Entry time as ISO string (simulated drivers may pass their own)"""
+        if self._entry_time is None:
+            self._entry_time = datetime.fromtimestamp(self._entry_ts).isoformat()
+        return self._entry_time
+    
+    @entry_time.setter
+    def entry_time(self, value: str) -> None:
+        self._entry_time = value
+        self._dict_cache = None
+    
     def calculate_liquidation_price(self) -> float:
         """Calculate liquidation price"""
         # Double check: Correct liquidation price for long/short with leverage is:
@@ -39,35 +170,51 @@ class Position:
     
     def calculate_unrealized_pnl(self) -> float:
         """Calculate unrealized PnL with leverage"""
-        direction = 1 if self.quantity >= 0 else -1
-        return (self.current_price - self.entry_price) * abs(self.quantity) * self.leverage * direction
+        return self._last_pnl
 
     def to_dict(self) -> Dict:
-        """Convert to dictionary for JSON serialization"""
-        return {
-            'symbol': self.symbol,
-            'quantity': self.quantity,
-            'entry_price': self.entry_price,
-            'current_price': self.current_price,
-            'liquidation_price': self.liquidation_price,
-            'leverage': self.leverage,
-            'unrealized_pnl': self.calculate_unrealized_pnl(),
-            'entry_time': self.entry_time
-        }
+        """Convert to dictionary for JSON serialization (cached until the price changes; do not mutate)"""
+        if self._dict_cache is None:
+            self._dict_cache = {
+                'symbol': self.symbol,
+                'quantity': self.quantity,
+                'entry_price': self.entry_price,
+                'current_price': self.current_price,
+                'liquidation_price': self.liquidation_price,
+                'leverage': self.leverage,
+                'unrealized_pnl': self.calculate_unrealized_pnl(),
+                'entry_time': self.entry_time
+            }
+        return self._dict_cache
     
     def calculate_risk_usd(self) -> float:
         """Calculate risk in USD (distance to stop loss)"""
         if self.stop_loss is None:
             return 0.0
-        direction = 1 if self.quantity >= 0 else -1
-        return abs(self.entry_price - self.stop_loss) * abs(self.quantity) * self.leverage
+        return abs(self.entry_price - self.stop_loss) * self._abs_qty * self.leverage
     
     def calculate_notional_usd(self) -> float:
         """Calculate notional value in USD"""
-        return abs(self.quantity) * self.current_price
+        return self._abs_qty * self.current_price
     
     def to_json(self) -> Dict[str, Any]:
-        """Convert to JSON format as requested"""
+        """Convert to JSON format as requested (cached until the price changes; do not mutate)"""
+        if self._json_cache is not None:
+            return self._json_cache
+        
+        if self._static_json is None:
+            self._static_json = self._build_static_json()
+        
+        # Copy the template (keeps key order) and fill in the price-dependent fields
+        result = dict(self._static_json)
+        result['current_price'] = self.current_price
+        result['unrealized_pnl'] = self.calculate_unrealized_pnl()
+        result['notional_usd'] = self.calculate_notional_usd()
+        self._json_cache = result
+        return result
+    
+    def _build_static_json(self) -> Dict[str, Any]:
+        """to_json fields that do not depend on the current price"""
         # Calculate exit plan
         exit_plan = {}
         if self.profit_target is not None:
@@ -84,14 +231,14 @@ class Position:
             'symbol': self.symbol,
             'quantity': self.quantity,
             'entry_price': self.entry_price,
-            'current_price': self.current_price,
+            'current_price': None,
             'liquidation_price': self.liquidation_price,
-            'unrealized_pnl': self.calculate_unrealized_pnl(),
+            'unrealized_pnl': None,
             'leverage': self.leverage,
             'exit_plan': exit_plan,
             'confidence': self.confidence,
             'risk_usd': self.calculate_risk_usd(),
-            'notional_usd': self.calculate_notional_usd()
+            'notional_usd': None
         }
     
     @classmethod
@@ -106,7 +253,8 @@ class Position:
             leverage=data.get('leverage', 1.0),
             profit_target=data.get('profit_target'),
             stop_loss=data.get('stop_loss'),
-            confidence=data.get('confidence', 0.5)
+            confidence=data.get('confidence', 0.5),
+            entry_time=data.get('entry_time')
         )
 
 
@@ -117,41 +265,42 @@ class SimplePortfolio:
         self.positions: Dict[str, Position] = {}
         self.initial_cash = initial_cash
         self.available_cash = initial_cash
-        self.total_asset = initial_cash
+        # Running totals over open positions, updated by deltas so total_asset is O(1)
+        self._total_collateral = 0.0
+        self._total_pnl = 0.0
+    
+    @property
+    def total_asset(self) -> float:
+        """Total asset value (available cash + collateral + unrealized PnL)"""
+        return self.available_cash + self._total_collateral + self._total_pnl
     
     def add_position(self, position: Position) -> None:
         """Add or replace position for a symbol"""
         # Calculate collateral needed for this position
-        collateral_needed = abs(position.quantity) * position.entry_price / position.leverage
+        collateral_needed = position._collateral
         
         # Check if we already have this position to handle collateral
         old_collateral = 0
-        if position.symbol in self.positions:
-            old_position = self.positions[position.symbol]
-            old_collateral = abs(old_position.quantity) * old_position.entry_price / old_position.leverage
+        old_pnl = 0.0
+        old_position = self.positions.get(position.symbol)
+        if old_position is not None:
+            old_collateral = old_position._collateral
+            old_pnl = old_position._last_pnl
         
         # Update available cash
         self.available_cash = self.available_cash + old_collateral - collateral_needed
+        self._total_collateral += collateral_needed - old_collateral
+        self._total_pnl += position._last_pnl - old_pnl
         
         # Add position
         self.positions[position.symbol] = position
-        
-        # Update total asset
-        self._update_total_asset()
     def decisions_display(self, all_decisions: Dict[str, Any]) -> None:
-        print("\n" + "="*80)
+        blocks = ["\n" + "="*80]
         for symbol, decision_data in all_decisions.items():
             args = decision_data["trade_signal_args"]
-            print(f"\n{symbol} Trading Decision:")
-            print(f"  Signal: {args['signal']}")
-            print(f"  Quantity: {args['quantity']}")
-            print(f"  Entry Price: ${args.get('entry_price', 0):.2f}")
-            print(f"  Profit Target: ${args['profit_target']}")
-            print(f"  Stop Loss: ${args['stop_loss']}")
-            print(f"  Leverage: {args['leverage']}x")
-            print(f"  Confidence: {args['confidence']}")
-            print(f"  Risk: ${args['risk_usd']}")
-            print(f"  Invalidation: {args['invalidation_condition']}")
+            blocks.append(_DECISION_FMT.format_map({'entry_price': 0, **args, 'symbol': symbol}))
+        # One write for all decisions
+        print("\n".join(blocks))
         
         
     def _validate_order_params(self, symbol: str, entry_price: float, leverage: float, quantity: float) -> Tuple[bool, str]:
@@ -186,7 +335,7 @@ class SimplePortfolio:
             profit_target: Profit target price (optional)
             stop_loss: Stop loss price (optional)
             confidence: Confidence level 0-1 (default: 0.5)
-            signal: Trading signal - 'buy', 'sell', 'hold', 'close' (or from decision_data)
+            signal: Trading signal - 'buy', 'sell', 'hold', 'close' or a Signal (or from decision_data)
             decision_data: Dictionary containing 'trade_signal_args' with order parameters
         
         Returns:
@@ -230,11 +379,11 @@ class SimplePortfolio:
             leverage = float(leverage) if leverage is not None else 1.0
 
             
-            # Normalize signal
-            normalized_signal = signal.lower() if signal else 'hold'
+            # Normalize signal once
+            sig = _to_signal(signal)
             
             # Handle explicit close signal
-            if normalized_signal == 'close':
+            if sig is Signal.CLOSE:
                 if symbol in self.positions:
                     self.remove_position(symbol)
                     print(f"🛑 {symbol}: Position closed by signal.")
@@ -244,13 +393,13 @@ class SimplePortfolio:
                     return False
 
             # If signal is hold, skip execution
-            if normalized_signal == 'hold' or quantity == 0.0:
+            if sig is Signal.HOLD or quantity == 0.0:
                 print(f"⏸️  {symbol}: No new position (signal=hold or quantity=0).")
                 return False
 
-            # Validate order parameters
-            is_valid, error_msg = self._validate_order_params(symbol, entry_price, leverage, quantity)
-            if not is_valid:
+            # Validate order parameters; the detailed message is only built on failure
+            if entry_price <= 0 or leverage <= 0 or quantity == 0.0:
+                _, error_msg = self._validate_order_params(symbol, entry_price, leverage, quantity)
                 print(f"❌ {symbol}: {error_msg}")
                 return False
 
@@ -287,18 +436,18 @@ class SimplePortfolio:
             # Rule: existing position + close -> close and update totals (already handled above)
             
             # Rule: existing position + buy/sell -> handle based on direction
-            if normalized_signal in ('buy', 'sell'):
+            if sig is Signal.BUY or sig is Signal.SELL:
                 if has_position:
                     existing_qty = self.positions[symbol].quantity
                     # Same direction - reject
-                    if existing_qty > 0 and normalized_signal == 'buy':
+                    if existing_qty > 0 and sig is Signal.BUY:
                         print(f"⚠️  {symbol}: Order not added - position already exists (Qty: {existing_qty})")
                         return False
-                    if existing_qty < 0 and normalized_signal == 'sell':
+                    if existing_qty < 0 and sig is Signal.SELL:
                         print(f"⚠️  {symbol}: Order not added - position already exists (Qty: {existing_qty})")
                         return False
                     # Opposite direction - close and open new
-                    if (existing_qty > 0 and normalized_signal == 'sell') or (existing_qty < 0 and normalized_signal == 'buy'):
+                    if (existing_qty > 0 and sig is Signal.SELL) or (existing_qty < 0 and sig is Signal.BUY):
                         self.remove_position(symbol)
                         self.add_position(position)
                         print(f"✅ {symbol}: Position reversed - Order added successfully (Qty: {quantity}, Price: ${entry_price:.2f}, Signal: {signal})")
@@ -311,93 +460,110 @@ class SimplePortfolio:
                     return True
             
             # Invalid signal
-            print(f"❌ {symbol}: Invalid signal: {normalized_signal}")
+            print(f"❌ {symbol}: Invalid signal: {str(signal).lower()}")
             return False
                 
         except Exception as e:
             print(f"❌ {symbol}: Error executing decision: {e}")
             return False
     
+    def add_order(self, symbol: str, quantity: float, price: float, leverage: float = 1.0,
+                  profit_target: Optional[float] = None, stop_loss: Optional[float] = None,
+                  confidence: float = 0.5, signal: Optional[str] = 'buy') -> bool:
+        """Place an order without reversing: buy/sell is rejected while the symbol has a position.
+        
+        The position check runs before any collateral math; hold and close go
+        straight to execute_decision, which exits before sizing the order.
+        """
+        # Same notion of "existing" as execute_decision: zero-quantity placeholders do not count
+        position = self.positions.get(symbol)
+        if position is not None and position.quantity != 0 and _to_signal(signal) in (Signal.BUY, Signal.SELL):
+            print(f"⚠️  {symbol}: Order not added - position already exists (Qty: {position.quantity})")
+            return False
+        return self.execute_decision(
+            symbol=symbol, quantity=quantity, price=price, leverage=leverage,
+            profit_target=profit_target, stop_loss=stop_loss, confidence=confidence, signal=signal
+        )
+    
     def remove_position(self, symbol: str) -> None:
         """Remove a position"""
         if symbol in self.positions:
             position = self.positions[symbol]
             # Return collateral to available cash
-            collateral = abs(position.quantity) * position.entry_price / position.leverage
+            collateral = position._collateral
             unrealized_pnl = position.calculate_unrealized_pnl()
             # When closing position, we get back collateral + unrealized PnL
             self.available_cash += collateral + unrealized_pnl
+            self._total_collateral -= collateral
+            self._total_pnl -= unrealized_pnl
         self.positions.pop(symbol, None)
-        # Update total asset
-        self._update_total_asset()
+        if not self.positions:
+            # Drop accumulated rounding once flat
+            self._total_collateral = 0.0
+            self._total_pnl = 0.0
     
     def update_price(self, symbol: str, new_price: float) -> None:
         """Update current price for a position"""
-        if symbol in self.positions:
-            self.positions[symbol].current_price = new_price
-            self._update_total_asset()
-    
-    def update_unrealized_pnl(self, symbol: str) -> None:
-        """Update PnL for a position"""
-        if symbol in self.positions:
-            self.positions[symbol].unrealized_pnl = self.positions[symbol].calculate_unrealized_pnl()
+        position = self.positions.get(symbol)
+        if position is not None and position.current_price != new_price:
+            old_pnl = position._last_pnl
+            position.current_price = new_price
+            self._total_pnl += position._last_pnl - old_pnl
     
     def update_all_prices(self, price_updates: Dict[str, float]) -> None:
         """Update prices for multiple positions at once"""
+        positions = self.positions
+        pnl_delta = 0.0
         for symbol, price in price_updates.items():
-            if symbol in self.positions:
-                self.positions[symbol].current_price = price
-        self._update_total_asset()
+            position = positions.get(symbol)
+            # Repeated ticks leave the position untouched
+            if position is not None and position.current_price != price:
+                old_pnl = position._last_pnl
+                position.current_price = price
+                pnl_delta += position._last_pnl - old_pnl
+        self._total_pnl += pnl_delta
     
     def _recalculate_assets(self) -> None:
         """Recalculate available cash and total asset based on current positions"""
-        # Calculate total collateral used
-        total_collateral = 0
-        for position in self.positions.values():
-            collateral = abs(position.quantity) * position.entry_price / position.leverage
-            total_collateral += collateral
+        self._update_total_asset()
         
         # Available cash = initial cash - collateral used
-        self.available_cash = self.initial_cash - total_collateral
-        
-        # Update total asset
-        self._update_total_asset()
+        self.available_cash = self.initial_cash - self._total_collateral
     
     def _update_total_asset(self) -> None:
-        """Calculate and update total asset value"""
-        # Total asset = available cash + (collateral + unrealized PnL for each position)
-        position_values = 0
-        for position in self.positions.values():
-            collateral = abs(position.quantity) * position.entry_price / position.leverage
-            unrealized_pnl = position.calculate_unrealized_pnl()
-            position_values += collateral + unrealized_pnl
-        
-        self.total_asset = self.available_cash + position_values
+        """Resync the running collateral and PnL totals from the positions"""
+        # add/remove/update_price keep them current afterwards by deltas
+        positions = self.positions.values()
+        self._total_collateral = sum(position._collateral for position in positions)
+        self._total_pnl = sum(position._last_pnl for position in positions)
     
-    def get_all_positions(self) -> List[Position]:
-        """Get all positions"""
-        return list(self.positions.values())
+    def get_all_positions(self) -> ValuesView[Position]:
+        """Get all positions (live view; copy with list() before adding or removing)"""
+        return self.positions.values()
     
     def total_pnl(self) -> float:
         """Calculate total PnL across all positions"""
-        return sum(pos.calculate_unrealized_pnl() for pos in self.positions.values())
+        return self._total_pnl
+    
+    def save_to_file(self, filename: str, timestamp: Optional[str] = None) -> None:
+        """Save portfolio to JSON file (timestamp defaults to now)"""
+        write_file_atomic(filename, self.to_bytes(timestamp))
     
-    def save_to_file(self, filename: str) -> None:
-        """Save portfolio to JSON file"""
+    def to_bytes(self, timestamp: Optional[str] = None) -> bytes:
+        """Portfolio snapshot as the indented JSON bytes save_to_file writes"""
         data = {
             'positions': [pos.to_dict() for pos in self.positions.values()],
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp or datetime.now().isoformat(),
             'initial_cash': self.initial_cash,
             'available_cash': self.available_cash,
             'total_asset': self.total_asset
         }
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
     
     def load_from_file(self, filename: str) -> None:
         """Load portfolio from JSON file"""
-        with open(filename, 'r') as f:
-            data = json.load(f)
+        with open(filename, 'rb') as f:
+            data = orjson.loads(f.read())
         
         # Load cash information if available
         self.initial_cash = data.get('initial_cash', self.initial_cash)
@@ -417,23 +583,32 @@ class SimplePortfolio:
             print("No positions")
             return
         
-        print(f"\n{'Symbol':<10} {'Qty':<10} {'Entry':<10} {'Current':<10} {'PnL':<10} {'Leverage':<10}")
-        print("-" * 70)
+        lines = [
+            f"\n{'Symbol':<10} {'Qty':<10} {'Entry':<10} {'Current':<10} {'PnL':<10} {'Leverage':<10}",
+            "-" * 70,
+        ]
         
+        total_pnl = 0.0
         for pos in self.positions.values():
             pnl = pos.calculate_unrealized_pnl()
-            pnl_str = f"${pnl:.4f}"
-            print(f"{pos.symbol:<10} {pos.quantity:<10.4f} ${pos.entry_price:<9.2f} ${pos.current_price:<9.2f} {pnl_str:<10} {pos.leverage}x")
+            total_pnl += pnl
+            lines.append(_DISPLAY_ROW_FMT.format(
+                sym=pos.symbol, qty=pos.quantity, entry=pos.entry_price,
+                cur=pos.current_price, pnl_str=f"${pnl:.4f}", lev=pos.leverage,
+            ))
         
-        print("-" * 70)
-        print(f"Total PnL: ${self.total_pnl():.4f}")
-        print(f"Available Cash: ${self.available_cash:.4f}")
-        print(f"Total Asset: ${self.total_asset:.4f}\n")
-    def return_json(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        lines.append("-" * 70)
+        lines.append(f"Total PnL: ${total_pnl:.4f}")
+        lines.append(f"Available Cash: ${self.available_cash:.4f}")
+        lines.append(f"Total Asset: ${self.total_asset:.4f}\n")
+        # One write for the whole table
+        print("\n".join(lines))
+    def return_json(self, symbol: Optional[str] = None, timestamp: Optional[str] = None) -> Dict[str, Any]:
         """Return portfolio data in JSON format
         
         Args:
             symbol: Optional symbol to return data for. If None, returns all positions.
+            timestamp: Optional ISO timestamp to report. If None, uses the current time.
         
         Returns:
             If symbol is provided: single position JSON
@@ -447,7 +622,7 @@ class SimplePortfolio:
         # Return all positions as a list
         return {
             'positions': [pos.to_json() for pos in self.positions.values()],
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp or datetime.now().isoformat(),
             'total_pnl': self.total_pnl(),
             'available_cash': self.available_cash,
             'total_asset': self.total_asset,
@@ -455,24 +630,24 @@ class SimplePortfolio:
         }
     def to_string(self, json_result: Dict[str, Any]) -> str:
         """Convert portfolio JSON to formatted string"""
-        result_string = "HERE IS YOUR ACCOUNT INFORMATION & PERFORMANCE\n"
-        
         # Calculate total return
         initial_cash = json_result.get('initial_cash', 10000.0)
         total_asset = json_result.get('total_asset', 0)
         total_return = ((total_asset - initial_cash) / initial_cash) * 100 if initial_cash > 0 else 0
         
-        result_string += f"Current Total Return (percent): {total_return:.2f}%\n"
-        result_string += f"Available Cash: {json_result.get('available_cash', 0):.2f}\n"
-        result_string += f"Current Account Value: {total_asset:.2f}\n"
-        result_string += "Current live positions & performance:\n\n"
+        parts = [
+            "HERE IS YOUR ACCOUNT INFORMATION & PERFORMANCE\n",
+            f"Current Total Return (percent): {total_return:.2f}%\n",
+            f"Available Cash: {json_result.get('available_cash', 0):.2f}\n",
+            f"Current Account Value: {total_asset:.2f}\n",
+            "Current live positions & performance:\n\n",
+        ]
         
         # Display each position
         positions = json_result.get('positions', [])
-        for pos in positions:
-            result_string += f"{pos}\n"
+        parts.extend(f"{pos}\n" for pos in positions)
         
-        return result_string
+        return "".join(parts)
 
 # Example usage
 if __name__ == "__main__":
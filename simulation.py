@@ -1,13 +1,18 @@
 """
 Simple Market Data Simulation - Buy positions and update portfolio every loop
 """
-import time
+import asyncio
+import logging
+import os
 import signal
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import orjson
 from dotenv import load_dotenv
-from hyperliquid_market_data import symbol_data_provider_json
-from simple_portfolio import SimplePortfolio
+from hyperliquid_market_data import AsyncHyperliquidClient, symbol_data_provider_json_async
+from simple_portfolio import SimplePortfolio, write_file_atomic
 from trade_decision_simple_AI import trade_decision_provider
 # from trade_decision_simple import trade_decision_provider
 
@@ -17,12 +22,17 @@ PORTFOLIO_FILE = 'portfolio.json'
 PORTFOLIO_INIT_FILE = 'portfolio_init.json'
 UPDATE_FREQUENCY = '3m'
 KLINE_COUNT = 10
-LOOP_SLEEP_SECONDS = 1  # Sleep duration between loops in seconds
+LOOP_SLEEP_SECONDS = 1  # Target loop period in seconds (sleep only for what is left of it)
 DISPLAY_INTERVAL = 1  # Display portfolio every N loops (1 = every loop)
 
 # Load environment variables
 load_dotenv()
 
+# Set DISPLAY_PORTFOLIO=0 (e.g. in .env) to skip the position table in headless runs
+DISPLAY_PORTFOLIO = os.getenv('DISPLAY_PORTFOLIO', '1') != '0'
+
+logger = logging.getLogger(__name__)
+
 # Global shutdown flag for graceful shutdown
 shutdown = False
 
@@ -34,138 +44,226 @@ def signal_handler(sig, frame):
     shutdown = True
 
 
-def safe_fetch_market_data(symbol: str) -> Optional[Dict[str, Any]]:
-    """Safely fetch market data for a symbol with error handling"""
+def _report_save(future: Future) -> None:
+    """Report the outcome of a background portfolio save"""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        print(f"❌ Error saving portfolio: {error}")
+
+
+async def safe_fetch_market_data(client: AsyncHyperliquidClient, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Safely fetch market data for all symbols concurrently; symbols that fail are left out"""
     try:
-        json_result = symbol_data_provider_json(symbol, UPDATE_FREQUENCY, KLINE_COUNT)
+        json_results = await symbol_data_provider_json_async(client, symbols, UPDATE_FREQUENCY, KLINE_COUNT)
+    except Exception as e:
+        print(f"❌ Error fetching market data: {e}")
+        return {}
+    
+    valid_results = {}
+    for symbol in symbols:
+        json_result = json_results.get(symbol)
         if not json_result or 'current_price' not in json_result:
             print(f"⚠️  {symbol}: No valid kline data returned")
-            return None
-        return json_result
+            continue
+        valid_results[symbol] = json_result
+    return valid_results
+
+
+async def run_loop() -> None:
+    """Run the simulation loop until a shutdown signal is received"""
+    # Set up signal handlers for graceful shutdown
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    # Load or create portfolio
+    portfolio = SimplePortfolio()
+
+    try:
+        portfolio.load_from_file(PORTFOLIO_INIT_FILE)
+        print("✅ Loaded existing portfolio")
+        print(f"Initial Cash: ${portfolio.initial_cash:,.2f}")
+        print(f"Available Cash: ${portfolio.available_cash:,.2f}")
+        if DISPLAY_PORTFOLIO:
+            portfolio.display()
+    except FileNotFoundError:
+        print("📝 Creating new portfolio")
+        print(f"Initial Cash: ${portfolio.initial_cash:,.2f}")
     except Exception as e:
-        print(f"❌ {symbol}: Error fetching market data: {e}")
-        return None
+        print(f"❌ Error loading portfolio: {e}")
+        print("📝 Starting with new portfolio")
 
+    loop_count = 0
+    portfolio_changed = False
 
-# Set up signal handlers for graceful shutdown
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
+    # One async client for the whole run, so its HTTP session stays open between loops
+    client = AsyncHyperliquidClient()
 
-# Load or create portfolio
-portfolio = SimplePortfolio()
+    # Portfolio saves run on one background thread so disk I/O overlaps the next loop
+    saver = ThreadPoolExecutor(max_workers=1)
+    pending_save: Optional[Future] = None
 
-try:
-    portfolio.load_from_file(PORTFOLIO_INIT_FILE)
-    print("✅ Loaded existing portfolio")
-    print(f"Initial Cash: ${portfolio.initial_cash:,.2f}")
-    print(f"Available Cash: ${portfolio.available_cash:,.2f}")
-    portfolio.display()
-except FileNotFoundError:
-    print("📝 Creating new portfolio")
-    print(f"Initial Cash: ${portfolio.initial_cash:,.2f}")
-except Exception as e:
-    print(f"❌ Error loading portfolio: {e}")
-    print("📝 Starting with new portfolio")
+    # Next loop's market data fetch, started before the sleep so it overlaps the idle time
+    next_fetch: Optional[asyncio.Task] = None
 
-loop_count = 0
-portfolio_changed = False
+    # Local aliases for the callables used on every loop
+    sleep = asyncio.sleep
+    monotonic = time.monotonic
 
-print("\n🚀 Starting simulation loop. Press Ctrl+C to stop gracefully.\n")
+    # Loops start on a fixed schedule so variable fetch/decision time does not add to the period
+    next_tick = monotonic()
 
-while not shutdown:
-    try:
-        loop_count += 1
-        print(f"\n{datetime.now().strftime('%H:%M:%S')} - Loop #{loop_count} - Fetching market data...")
-        
-        market_data_for_decisions_json = {}
-        successful_fetches = 0
-        
-        # Fetch market data for each symbol
-        for symbol in SYMBOLS:
-            json_result = safe_fetch_market_data(symbol)
-            if json_result is None:
-                continue
-            
-            # Add symbol and frequency to json_result
-            json_result['symbol'] = symbol
-            json_result['frequency'] = UPDATE_FREQUENCY
-            
-            current_price = json_result['current_price']
-            print(f"✅ {symbol}: ${current_price:,.2f}")
-            
-            # Update portfolio prices
-            portfolio.update_price(symbol, current_price)
-            portfolio.update_unrealized_pnl(symbol)
-            market_data_for_decisions_json[symbol] = json_result
-            successful_fetches += 1
-        
-        # Skip decision making if no market data was fetched
-        if successful_fetches == 0:
-            print("⚠️  No market data fetched for any symbol. Skipping this loop.")
-            time.sleep(LOOP_SLEEP_SECONDS)
-            continue
-        
-        # Display portfolio (at intervals or when changed)
-        if loop_count % DISPLAY_INTERVAL == 0 or portfolio_changed:
-            portfolio.display()
-        
-        portfolio_json = portfolio.return_json()
-        
-        # Generate trading decisions
-        print("\n📊 Generating Trading Decisions...")
-        
-        try:
-            all_decisions = trade_decision_provider(market_data_for_decisions_json, portfolio_json)
-        except Exception as e:
-            print(f"❌ Error generating trading decisions: {e}")
-            all_decisions = {}
-        
-        if not all_decisions:
-            print("\n⏸️  No new trading signals generated.")
+    async def wait_next_tick() -> None:
+        nonlocal next_tick
+        next_tick += LOOP_SLEEP_SECONDS
+        delay = next_tick - monotonic()
+        if delay > 0:
+            await sleep(delay)
         else:
-            portfolio.decisions_display(all_decisions)
-            
-            print("\n📝 Executing Orders...")
-            portfolio_changed = False
-            
-            for symbol, decision_data in all_decisions.items():
-                if portfolio.execute_decision(symbol=symbol, decision_data=decision_data):
-                    portfolio_changed = True
-        
-        print("\n" + "="*80)
-        
-        # Save portfolio only if it changed
-        if portfolio_changed:
+            # Running behind; restart the schedule instead of bursting to catch up
+            next_tick = monotonic()
+    fetch_market_data = safe_fetch_market_data
+    update_all_prices = portfolio.update_all_prices
+
+    print("\n🚀 Starting simulation loop. Press Ctrl+C to stop gracefully.\n")
+
+    while not shutdown:
+        try:
+            loop_count += 1
+            # One clock read per loop, shared by the log line, return_json and save_to_file
+            now = datetime.now()
+            timestamp = now.isoformat()
+            print(f"\n{now.strftime('%H:%M:%S')} - Loop #{loop_count} - Fetching market data...")
+
+            market_data_for_decisions_json = {}
+            latest_prices = {}
+            price_lines = []
+            successful_fetches = 0
+
+            # Fetch market data for all symbols concurrently (or collect the prefetch)
+            if next_fetch is not None:
+                fetched, next_fetch = await next_fetch, None
+            else:
+                fetched = await fetch_market_data(client, SYMBOLS)
+
+            for symbol, json_result in fetched.items():
+                # Add symbol and frequency to json_result
+                json_result['symbol'] = symbol
+                json_result['frequency'] = UPDATE_FREQUENCY
+
+                current_price = json_result['current_price']
+                price_lines.append(f"✅ {symbol}: ${current_price:,.2f}")
+
+                latest_prices[symbol] = current_price
+                market_data_for_decisions_json[symbol] = json_result
+                successful_fetches += 1
+
+            if price_lines:
+                print("\n".join(price_lines))
+
+            # Update portfolio prices in one batch
+            update_all_prices(latest_prices)
+
+            # Skip decision making if no market data was fetched
+            if successful_fetches == 0:
+                print("⚠️  No market data fetched for any symbol. Skipping this loop.")
+                await wait_next_tick()
+                continue
+
+            # Display portfolio (at intervals or when changed)
+            if DISPLAY_PORTFOLIO and (loop_count % DISPLAY_INTERVAL == 0 or portfolio_changed):
+                portfolio.display()
+
+            portfolio_json = portfolio.return_json(timestamp=timestamp)
+
+            # Generate trading decisions
+            print("\n📊 Generating Trading Decisions...")
+
             try:
-                portfolio.save_to_file(PORTFOLIO_FILE)
-                print("💾 Portfolio saved to file")
+                # Worker thread: the blocking LLM call must not stall the event loop (signal wakeups, timers)
+                all_decisions = await asyncio.to_thread(
+                    trade_decision_provider, market_data_for_decisions_json, portfolio_json
+                )
             except Exception as e:
-                print(f"❌ Error saving portfolio: {e}")
-        
-        # Display portfolio metrics
-        total_pnl = portfolio.total_pnl()
-        print(f"\n💰 Portfolio Metrics:")
-        print(f"  Available Cash: ${portfolio.available_cash:,.2f}")
-        print(f"  Total Asset Value: ${portfolio.total_asset:,.2f}")
-        print(f"  Total Unrealized PnL: ${total_pnl:,.2f}")
-        
-        # Sleep to prevent excessive API calls
-        time.sleep(LOOP_SLEEP_SECONDS)
-        
-    except KeyboardInterrupt:
-        # This should be caught by signal handler, but just in case
-        break
+                print(f"❌ Error generating trading decisions: {e}")
+                all_decisions = {}
+
+            if not all_decisions:
+                print("\n⏸️  No new trading signals generated.")
+            else:
+                portfolio.decisions_display(all_decisions)
+
+                print("\n📝 Executing Orders...")
+                portfolio_changed = False
+
+                for symbol, decision_data in all_decisions.items():
+                    if portfolio.execute_decision(symbol=symbol, decision_data=decision_data):
+                        portfolio_changed = True
+
+            print("\n" + "="*80)
+
+            # Save portfolio only if it changed
+            if portfolio_changed:
+                try:
+                    # Snapshot on this thread; only the file write is handed off
+                    payload = portfolio.to_bytes(timestamp)
+                    # A queued write that has not started is superseded by this newer snapshot
+                    if pending_save is not None:
+                        pending_save.cancel()
+                    pending_save = saver.submit(write_file_atomic, PORTFOLIO_FILE, payload)
+                    pending_save.add_done_callback(_report_save)
+                    print("💾 Portfolio save queued")
+                except Exception as e:
+                    print(f"❌ Error saving portfolio: {e}")
+
+            # Portfolio metrics as one structured line for monitors that consume the log
+            logger.info("portfolio_metrics %s", orjson.dumps({
+                'loop': loop_count,
+                'timestamp': timestamp,
+                'total_asset': portfolio.total_asset,
+                'available_cash': portfolio.available_cash,
+                'total_pnl': portfolio.total_pnl(),
+                'n_positions': len(portfolio.positions),
+            }).decode())
+
+            # Prefetch the next loop's market data while this one sleeps
+            if not shutdown:
+                next_fetch = asyncio.create_task(fetch_market_data(client, SYMBOLS))
+
+            # Wait for the next tick to prevent excessive API calls
+            await wait_next_tick()
+
+        except KeyboardInterrupt:
+            # This should be caught by signal handler, but just in case
+            break
+        except Exception as e:
+            print(f"\n❌ Unexpected error in main loop: {e}")
+            print("Continuing to next iteration...")
+            await wait_next_tick()
+
+    # Final save on shutdown
+    print("\n\n🛑 Shutting down gracefully...")
+    if next_fetch is not None:
+        next_fetch.cancel()
+    saver.shutdown(wait=True)
+    try:
+        portfolio.save_to_file(PORTFOLIO_FILE)
+        print("✅ Portfolio saved before shutdown")
     except Exception as e:
-        print(f"\n❌ Unexpected error in main loop: {e}")
-        print("Continuing to next iteration...")
-        time.sleep(LOOP_SLEEP_SECONDS)
-
-# Final save on shutdown
-print("\n\n🛑 Shutting down gracefully...")
-try:
-    portfolio.save_to_file(PORTFOLIO_FILE)
-    print("✅ Portfolio saved before shutdown")
-except Exception as e:
-    print(f"❌ Error saving portfolio on shutdown: {e}")
-
-print("👋 Simulation stopped.")
+        print(f"❌ Error saving portfolio on shutdown: {e}")
+    await client.close()
+
+    print("👋 Simulation stopped.")
+
+
+def run() -> None:
+    """Run the simulation until a shutdown signal is received"""
+    asyncio.run(run_loop())
+
+
+if __name__ == "__main__":
+    # Libraries (market data, httpx) stay at WARNING; only this module's metrics go out at INFO
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    logger.setLevel(logging.INFO)
+    run()
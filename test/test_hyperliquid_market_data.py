@@ -0,0 +1,171 @@
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+import hyperliquid_market_data as hmd
+
+
+class FakeClock:
+    """Stands in for the time module: wall clock, monotonic clock and sleep"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeExchange:
+    """Serves fetch_ohlcv from a list of canned results (exceptions are raised)"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.markets = None
+        self.calls = 0
+        self.limits = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls += 1
+        self.limits.append(limit)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _candles(n, close=100.0):
+    return [[i * 180_000, close, close + 1, close - 1, close, 10.0] for i in range(n)]
+
+
+@pytest.fixture
+def clock(monkeypatch, tmp_path):
+    clock = FakeClock()
+    monkeypatch.setattr(hmd, 'time', clock)
+    monkeypatch.setattr(hmd, '_ohlcv_cache', OrderedDict())
+    monkeypatch.setattr(hmd, '_last_close', {})
+    monkeypatch.setattr(hmd, '_markets_source', None)
+    monkeypatch.setattr(hmd, 'OHLCV_SNAPSHOT_DIR', str(tmp_path))
+    monkeypatch.setattr(hmd, '_saved_snapshots', {})
+    return clock
+
+
+def _client(exchange):
+    client = hmd.HyperliquidClient.__new__(hmd.HyperliquidClient)
+    client.exchange = exchange
+    return client
+
+
+def test_cache_entry_expires_after_ttl(clock):
+    key = hmd._ohlcv_cache_key('BTC/USDC:USDC', '3m', 10)
+    hmd._ohlcv_cache_put(key, np.asarray(_candles(3), dtype=np.float64))
+    clock.now += hmd.OHLCV_CACHE_TTL_SECONDS - 0.1
+    assert hmd._ohlcv_cache_get(key) is not None
+    clock.now += 0.2
+    assert hmd._ohlcv_cache_get(key) is None
+    assert key not in hmd._ohlcv_cache
+
+
+def test_cache_key_rolls_over_with_the_candle(clock):
+    clock.now = 180.0 * 1000 + 179.0
+    before = hmd._ohlcv_cache_key('BTC/USDC:USDC', '3m', 10)
+    clock.now += 0.5
+    assert hmd._ohlcv_cache_key('BTC/USDC:USDC', '3m', 10) == before
+    clock.now += 1.0
+    assert hmd._ohlcv_cache_key('BTC/USDC:USDC', '3m', 10) != before
+
+
+def test_cache_evicts_least_recently_used(clock, monkeypatch):
+    monkeypatch.setattr(hmd, 'OHLCV_CACHE_MAX_SIZE', 2)
+    keys = [('S', '3m', 10, i) for i in range(3)]
+    hmd._ohlcv_cache_put(keys[0], np.asarray(_candles(1), dtype=np.float64))
+    hmd._ohlcv_cache_put(keys[1], np.asarray(_candles(1), dtype=np.float64))
+    assert hmd._ohlcv_cache_get(keys[0]) is not None  # keys[1] is now the oldest
+    hmd._ohlcv_cache_put(keys[2], np.asarray(_candles(1), dtype=np.float64))
+    assert list(hmd._ohlcv_cache) == [keys[0], keys[2]]
+
+
+def test_repeated_fetch_is_served_read_only_from_cache(clock):
+    exchange = FakeExchange(_candles(5))
+    client = _client(exchange)
+    first = client.get_ohlcv_array('BTC', period='3m', count=5)
+    second = client.get_ohlcv_array('BTC', period='3m', count=5)
+    assert exchange.calls == 1
+    assert second is first
+    assert not first.flags.writeable
+    with pytest.raises(ValueError):
+        first[0, 4] = 0.0
+
+
+def test_request_beyond_the_served_history_is_clamped(clock, caplog):
+    exchange = FakeExchange(_candles(3))
+    candles = _client(exchange).get_ohlcv_array('BTC', period='3m', count=hmd.HYPERLIQUID_OHLCV_MAX + 1000)
+    assert exchange.limits == [hmd.HYPERLIQUID_OHLCV_MAX]
+    assert candles.shape == (3, 6)
+    assert "serves only the latest" in caplog.text
+
+
+def test_last_price_comes_from_a_recent_kline_fetch(clock):
+    client = _client(FakeExchange(_candles(3, close=123.0)))
+    client.get_ohlcv_array('BTC', period='3m', count=3)
+    # fetch_ticker is never reached: the fake exchange does not have it
+    assert client.get_last_price('BTC') == 123.0
+
+
+def test_last_price_cache_has_a_stale_cutoff(clock):
+    client = _client(FakeExchange(_candles(3, close=123.0)))
+    client.get_ohlcv_array('BTC', period='3m', count=3)
+    clock.now += hmd.OHLCV_CACHE_TTL_SECONDS + 0.1
+    assert client.last_price_from_ohlcv_cache('BTC') is None
+    assert client.last_price_from_ohlcv_cache('ETH') is None
+
+
+def test_transient_errors_are_retried_with_backoff(clock):
+    exchange = FakeExchange(hmd.ccxt.NetworkError('boom'), hmd.ccxt.RequestTimeout('slow'), _candles(3))
+    candles = _client(exchange).get_ohlcv_array('BTC', period='3m', count=3)
+    assert len(candles) == 3
+    assert clock.sleeps == [hmd.OHLCV_RETRY_BASE_DELAY, hmd.OHLCV_RETRY_BASE_DELAY * 2]
+
+
+def test_gives_up_after_the_last_attempt(clock):
+    exchange = FakeExchange(*[hmd.ccxt.NetworkError('down')] * hmd.OHLCV_RETRY_ATTEMPTS)
+    candles = _client(exchange).get_ohlcv_array('BTC', period='3m', count=3)
+    assert exchange.calls == hmd.OHLCV_RETRY_ATTEMPTS
+    assert len(clock.sleeps) == hmd.OHLCV_RETRY_ATTEMPTS - 1
+    assert candles.shape == (0, 6)
+
+
+def test_failed_fetch_falls_back_to_a_recent_snapshot(clock):
+    good = _client(FakeExchange(_candles(3, close=50.0)))
+    good.get_ohlcv_array('BTC', period='3m', count=3)
+    path = hmd._snapshot_path('BTC/USDC:USDC', '3m')
+    clock.now = hmd.os.path.getmtime(path) + 1
+    clock.now += 2 * hmd._TIMEFRAME_SECONDS['3m']  # next candle, so the response cache misses
+
+    down = FakeExchange(hmd.ccxt.ExchangeError('rejected'))
+    candles = _client(down).get_ohlcv_array('BTC', period='3m', count=2)
+    assert candles[:, 4].tolist() == [50.0, 50.0]
+
+    clock.now += hmd.OHLCV_SNAPSHOT_MAX_AGE_SECONDS
+    stale = _client(FakeExchange(hmd.ccxt.ExchangeError('rejected'))).get_ohlcv_array('BTC', period='3m', count=2)
+    assert stale.shape == (0, 6)
+
+
+def test_unchanged_response_is_not_rewritten(clock, monkeypatch):
+    saves = []
+    monkeypatch.setattr(hmd.np, 'save', lambda path, candles: saves.append(path))
+    candles = np.asarray(_candles(3), dtype=np.float64)
+    hmd._save_ohlcv_snapshot('BTC/USDC:USDC', '3m', candles)
+    hmd._save_ohlcv_snapshot('BTC/USDC:USDC', '3m', candles.copy())
+    changed = candles.copy()
+    changed[-1, 4] = 101.0
+    hmd._save_ohlcv_snapshot('BTC/USDC:USDC', '3m', changed)
+    assert len(saves) == 2
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(50).cumsum()
+    high = close + rng.random(50)
+    low = close - rng.random(50)
+    return high, low, close
+
+
+def test_ema_matches_pandas_adjusted_ewm(candles):
+    _, _, close = candles
+    expected = pd.Series(close).ewm(span=20, adjust=True).mean().to_numpy()
+    assert np.allclose(indicators.ema(close, 20), expected)
+
+
+def test_ema_valid_from_first_candle():
+    # Windows shorter than the period still produce values (no NaN warm-up)
+    result = indicators.ema(np.array([1.0, 2.0, 3.0]), 50)
+    assert not np.isnan(result).any()
+    assert result[0] == 1.0
+
+
+def test_rsi_bounds_and_first_value(candles):
+    _, _, close = candles
+    result = indicators.rsi(close, 14)
+    assert result[0] == 50.0
+    assert ((result >= 0) & (result <= 100)).all()
+    assert np.allclose(indicators.rsi(np.arange(1.0, 11.0), 7)[1:], 100.0)
+
+
+def test_atr_is_smoothed_true_range(candles):
+    high, low, close = candles
+    prev_close = np.concatenate(([close[0]], close[:-1]))
+    tr = np.maximum(high - low, np.maximum(abs(high - prev_close), abs(low - prev_close)))
+    expected = pd.Series(tr).ewm(alpha=1 / 14, adjust=True).mean().to_numpy()
+    assert np.allclose(indicators.atr(high, low, close, 14), expected)
+
+
+def test_macd_line_and_signal(candles):
+    _, _, close = candles
+    line, signal = indicators.macd(close)
+    assert np.allclose(line, indicators.ema(close, 12) - indicators.ema(close, 26))
+    assert np.allclose(signal, indicators.ema(line, 9))
+
+
+def test_emas_match_individual_passes(candles):
+    _, _, close = candles
+    result = indicators.emas(close, (12, 20, 26, 50))
+    for period, values in result.items():
+        assert np.allclose(values, indicators.ema(close, period))
@@ -0,0 +1,25 @@
+import pytest
+from simple_portfolio import Position
+
+
+@pytest.mark.parametrize("quantity", [2.0, -2.0, 0.0])
+def test_unrealized_pnl_matches_directional_formula(quantity):
+    position = Position("BTC", quantity, entry_price=100.0, current_price=110.0, leverage=3.0)
+    direction = 1 if quantity >= 0 else -1
+    expected = (110.0 - 100.0) * abs(quantity) * 3.0 * direction
+    assert position.calculate_unrealized_pnl() == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("quantity", [2.0, -2.0])
+def test_risk_usd_is_a_magnitude(quantity):
+    position = Position("BTC", quantity, entry_price=100.0, leverage=3.0, stop_loss=95.0)
+    assert position.calculate_risk_usd() == pytest.approx(5.0 * 2.0 * 3.0)
+
+
+def test_order_fields_are_read_only():
+    position = Position("BTC", 2.0, entry_price=100.0, leverage=3.0)
+    with pytest.raises(AttributeError):
+        position.quantity = 5.0
+    assert position.calculate_unrealized_pnl() == 0.0
+    position.current_price = 110.0  # the mark price stays settable
+    assert position.calculate_unrealized_pnl() == pytest.approx(60.0)
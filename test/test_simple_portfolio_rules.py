@@ -1,6 +1,8 @@
-
+import os
+import random
+import stat
 import pytest
-from simple_portfolio import SimplePortfolio
+from simple_portfolio import SimplePortfolio, write_file_atomic
 
 
 @pytest.fixture
@@ -94,3 +96,72 @@ def test_open_position_when_no_existing(symbol, quantity, price, leverage):
     assert portfolio.positions[symbol].quantity == quantity
 
 
+def test_decisions_display_with_symbol_in_args(portfolio, capsys):
+    # Providers may echo the symbol inside trade_signal_args
+    decision = {"trade_signal_args": {
+        "symbol": "BTC", "signal": "hold", "quantity": 0.0, "entry_price": 100.0,
+        "profit_target": 110.0, "stop_loss": 95.0, "leverage": 5, "confidence": 0.5,
+        "risk_usd": 0.0, "invalidation_condition": "none",
+    }}
+    portfolio.decisions_display({"BTC": decision})
+    assert "BTC Trading Decision:" in capsys.readouterr().out
+
+
+def test_running_totals_match_recomputation():
+    # Open, reverse, close and reprice in a fixed pseudo-random sequence
+    rng = random.Random(7)
+    portfolio = SimplePortfolio(initial_cash=100000.0)
+    symbols = ["BTC", "ETH", "SOL"]
+    prices = {"BTC": 100.0, "ETH": 20.0, "SOL": 5.0}
+    for _ in range(300):
+        symbol = rng.choice(symbols)
+        action = rng.random()
+        if action < 0.4:
+            prices = {s: p * rng.uniform(0.9, 1.1) for s, p in prices.items()}
+            if rng.random() < 0.5:
+                portfolio.update_all_prices(prices)
+            else:
+                portfolio.update_price(symbol, prices[symbol])
+        elif action < 0.85:
+            signal = rng.choice(["buy", "sell"])
+            quantity = rng.uniform(0.1, 3.0) * (1 if signal == "buy" else -1)
+            portfolio.execute_decision(symbol=symbol, quantity=quantity, price=prices[symbol],
+                                       leverage=rng.choice([1.0, 2.0, 5.0]), signal=signal)
+        else:
+            portfolio.execute_decision(symbol=symbol, quantity=0.0, price=prices[symbol], signal="close")
+
+        positions = list(portfolio.positions.values())
+        expected_pnl = sum(p.calculate_unrealized_pnl() for p in positions)
+        expected_collateral = sum(abs(p.quantity) * p.entry_price / p.leverage for p in positions)
+        assert portfolio.total_pnl() == pytest.approx(expected_pnl, abs=1e-6)
+        assert portfolio._total_collateral == pytest.approx(expected_collateral, abs=1e-6)
+        assert portfolio.total_asset == pytest.approx(
+            portfolio.available_cash + expected_collateral + expected_pnl, abs=1e-6)
+
+
+def test_write_file_atomic_replaces_content_and_keeps_mode(tmp_path):
+    target = tmp_path / "portfolio.json"
+    target.write_bytes(b"old")
+    os.chmod(target, 0o640)
+    write_file_atomic(str(target), b"new")
+    assert target.read_bytes() == b"new"
+    assert stat.S_IMODE(os.stat(target).st_mode) == 0o640
+    assert os.listdir(tmp_path) == ["portfolio.json"]  # no temp file left behind
+
+
+def test_write_file_atomic_new_file_follows_umask(tmp_path):
+    old_umask = os.umask(0o027)
+    try:
+        write_file_atomic(str(tmp_path / "new.json"), b"{}")
+    finally:
+        os.umask(old_umask)
+    assert stat.S_IMODE(os.stat(tmp_path / "new.json").st_mode) == 0o640
+
+
+def test_add_order_opens_over_zero_quantity_placeholder():
+    # portfolio_init.json ships flat BTC/ETH/SOL entries
+    portfolio = SimplePortfolio()
+    portfolio.load_from_file(os.path.join(os.path.dirname(__file__), "..", "portfolio_init.json"))
+    assert portfolio.positions["BTC"].quantity == 0.0
+    assert portfolio.add_order("BTC", 0.01, 100.0, signal="buy") is True
+    assert portfolio.positions["BTC"].quantity == 0.01
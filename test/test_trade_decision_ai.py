@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+import trade_decision_simple_AI as provider
+
+
+class FakeClient:
+    """Stands in for the OpenAI client; replies with a fixed JSON body"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content=orjson.dumps(self.reply).decode())
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _args(coin, signal="hold"):
+    return {"trade_signal_args": {"coin": coin, "signal": signal, "quantity": 0.0}}
+
+
+MARKET_DATA = {"BTC": {"current_price": 100.0}, "ETH": {"current_price": 10.0}}
+PORTFOLIO = {"initial_cash": 1000.0, "total_asset": 1000.0, "available_cash": 1000.0, "positions": []}
+
+
+@pytest.fixture
+def use_client(monkeypatch):
+    monkeypatch.setattr(provider, "_response_cache", {})
+
+    def install(reply):
+        client = FakeClient(reply)
+        monkeypatch.setattr(provider, "_client", client)
+        return client
+
+    return install
+
+
+def test_one_call_maps_block_ids_to_symbols(use_client):
+    client = use_client({"2": _args("ETH", "buy"), "1": _args("BTC")})
+    decisions = provider.trade_decision_provider(MARKET_DATA, PORTFOLIO)
+    assert len(client.calls) == 1
+    assert decisions["BTC"]["trade_signal_args"]["coin"] == "BTC"
+    assert decisions["ETH"]["trade_signal_args"]["signal"] == "buy"
+    prompt = client.calls[0]["messages"][-1]["content"]
+    assert "[1] ALL BTC DATA" in prompt and "[2] ALL ETH DATA" in prompt
+
+
+def test_unchanged_inputs_reuse_the_cached_reply(use_client):
+    client = use_client({"1": _args("BTC"), "2": _args("ETH")})
+    provider.trade_decision_provider(MARKET_DATA, {**PORTFOLIO, "timestamp": "a"})
+    provider.trade_decision_provider(MARKET_DATA, {**PORTFOLIO, "timestamp": "b"})
+    assert len(client.calls) == 1
+
+
+@pytest.mark.parametrize("reply", [
+    {"1": _args("BTC")},                       # a symbol missing
+    {"1": _args("BTC"), "3": _args("ETH")},    # unknown block id
+    {"1": _args("BTC"), "2": {"coin": "ETH"}},  # no trade_signal_args
+    {"1": _args("BTC"), "2": [1, 2]},           # entry is not an object
+])
+def test_mismatched_or_malformed_reply_raises(use_client, reply):
+    use_client(reply)
+    with pytest.raises(ValueError):
+        provider.trade_decision_provider(MARKET_DATA, PORTFOLIO)
+
+
+def test_non_object_reply_raises(use_client):
+    use_client([_args("BTC"), _args("ETH")])
+    with pytest.raises(ValueError):
+        provider.trade_decision_provider(MARKET_DATA, PORTFOLIO)
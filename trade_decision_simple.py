@@ -2,7 +2,13 @@
 Trading Decision Provider - Generates trading signals based on market data
 """
 from typing import Dict, Any
-import random
+import numpy as np
+
+_rng = np.random.default_rng()
+# Indexed by direction + 1 (direction -1 = sell, 0 = hold, 1 = buy, 2 = close)
+_SIGNAL_TABLE = np.array(["sell", "hold", "buy", "close"], dtype=object)
+_LEVERAGES = np.array([1, 5, 10, 15, 20, 25])
+_INVALIDATION_CONDITIONS = ["If the price closes below {stop_loss:.2f} on a 3-minute candle", "If the price closes above {profit_target:.2f} on a 3-minute candle"]
 
 
 def trade_decision_provider(market_data_dict: Dict[str, Dict[str, Any]], portfolio_json: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
@@ -18,32 +24,39 @@ def trade_decision_provider(market_data_dict: Dict[str, Dict[str, Any]], portfol
     """
     all_decisions = {}
     
-    for symbol, market_data in market_data_dict.items():
-        
-        current_price = market_data.get('current_price', 0)
-        
-        direction = random.choice([-1, 0, 1, 2])
-        signal = "buy" if direction == 1 else "hold" if direction == 0 else "sell" if direction == -1 else "close"
-        quantity = random.uniform(0.00001, 0.01)
-        leverage = random.choice([1, 5, 10, 15, 20, 25])
-        confidence = random.uniform(0.5, 1.0)
-        risk_per_trade = random.uniform(100, 1000)
-        profit_target = random.uniform(current_price * 1.1, current_price * 1.2)
-        stop_loss = random.uniform(current_price * 0.9, current_price * 0.95)
-        invalidation_condition = random.choice(["If the price closes below {stop_loss:.2f} on a 3-minute candle", "If the price closes above {profit_target:.2f} on a 3-minute candle"])
-        
+    # Draw every random value for the batch up front, one row per symbol
+    n = len(market_data_dict)
+    u = _rng.random((n, 5))
+    signal_idx = _rng.integers(0, len(_SIGNAL_TABLE), size=n)
+    signals = _SIGNAL_TABLE[signal_idx].tolist()
+    leverages = _rng.choice(_LEVERAGES, size=n).tolist()
+    conditions = _rng.integers(0, len(_INVALIDATION_CONDITIONS), size=n).tolist()
+    current_prices = np.array([market_data.get('current_price', 0) for market_data in market_data_dict.values()], dtype=np.float64)
+    
+    # Scale to the target ranges and round as whole columns; quantity takes the direction's sign
+    directions = signal_idx - 1
+    quantities = np.round((0.00001 + u[:, 0] * (0.01 - 0.00001)) * directions, 4).tolist()
+    confidences = np.round(0.5 + u[:, 1] * 0.5, 2).tolist()
+    risks = (100 + u[:, 2] * 900).tolist()
+    profit_targets = np.round(current_prices * (1.1 + u[:, 3] * 0.1), 2).tolist()
+    stop_losses = np.round(current_prices * (0.9 + u[:, 4] * 0.05), 2).tolist()
+    entry_prices = np.round(current_prices, 2).tolist()
+    
+    for symbol, signal, quantity, profit_target, stop_loss, condition, leverage, confidence, risk_per_trade, entry_price in zip(
+        market_data_dict, signals, quantities, profit_targets, stop_losses, conditions, leverages, confidences, risks, entry_prices
+    ):
         all_decisions[symbol] = {
             "trade_signal_args": {
                 "coin": symbol,
                 "signal": signal,
-                "quantity": round(abs(quantity) * direction, 4),
-                "profit_target": round(profit_target, 2),
-                "stop_loss": round(stop_loss, 2),
-                "invalidation_condition": invalidation_condition,
+                "quantity": quantity,
+                "profit_target": profit_target,
+                "stop_loss": stop_loss,
+                "invalidation_condition": _INVALIDATION_CONDITIONS[condition],
                 "leverage": leverage,
-                "confidence": round(confidence, 2),
+                "confidence": confidence,
                 "risk_usd": risk_per_trade,
-                "entry_price": round(current_price, 2)
+                "entry_price": entry_price
             }
         }
     
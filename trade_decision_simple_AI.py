@@ -1,17 +1,31 @@
 """
 Trading Decision Provider - Generates trading signals based on market data
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
-import json
+import hashlib
 import math
 import os
+import time
 import dotenv
+import numpy as np
+import orjson
 dotenv.load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 
+_FREQ_MAP = {
+    '1m': '1-minute',
+    '3m': '3-minute',
+    '5m': '5-minute',
+    '15m': '15-minute',
+    '30m': '30-minute',
+    '1h': 'hourly',
+    '4h': '4-hour',
+    '1d': 'daily'
+}
+
 def _fmt_number(value: Any, decimals: int = 2) -> str:
     try:
         if value is None:
@@ -26,11 +40,11 @@ def _fmt_number(value: Any, decimals: int = 2) -> str:
 
 def portfolio_to_string(portfolio_json: Dict[str, Any], symbol: str = None) -> str:
     """Convert portfolio JSON to a concise, human‑readable summary."""
-    result_string = "HERE IS YOUR ACCOUNT INFORMATION & PERFORMANCE\n"
+    parts = ["HERE IS YOUR ACCOUNT INFORMATION & PERFORMANCE"]
 
     timestamp = portfolio_json.get('timestamp')
     if timestamp:
-        result_string += f"As of: {timestamp}\n"
+        parts.append(f"As of: {timestamp}")
 
     initial_cash = float(portfolio_json.get('initial_cash', 0) or 0)
     total_asset = float(portfolio_json.get('total_asset', 0) or 0)
@@ -39,16 +53,15 @@ def portfolio_to_string(portfolio_json: Dict[str, Any], symbol: str = None) -> s
 
     total_return_pct = (100.0 * (total_asset - initial_cash) / initial_cash) if initial_cash > 0 else 0.0
 
-    result_string += f"Current Total Return (percent): {_fmt_number(total_return_pct, 2)}%\n"
-    result_string += f"Available Cash: ${_fmt_number(available_cash, 2)}\n"
-    result_string += f"Current Account Value: ${_fmt_number(total_asset, 2)}\n"
-    result_string += f"Total Unrealized PnL: ${_fmt_number(total_pnl, 2)}\n"
-    result_string += "Current live positions & performance:\n\n"
+    parts.append(f"Current Total Return (percent): {_fmt_number(total_return_pct, 2)}%")
+    parts.append(f"Available Cash: ${_fmt_number(available_cash, 2)}")
+    parts.append(f"Current Account Value: ${_fmt_number(total_asset, 2)}")
+    parts.append(f"Total Unrealized PnL: ${_fmt_number(total_pnl, 2)}")
+    parts.append("Current live positions & performance:\n")
 
     positions = portfolio_json.get('positions', []) or []
     if not positions:
-        result_string += "(No open positions)\n"
-        return result_string
+        parts.append("(No open positions)")
 
     for pos in positions:
         symbol = pos.get('symbol', 'N/A')
@@ -73,39 +86,26 @@ def portfolio_to_string(portfolio_json: Dict[str, Any], symbol: str = None) -> s
         )
         if confidence is not None:
             line += f", Confidence: {_fmt_number(float(confidence), 2)}"
-        result_string += line + "\n"
+        parts.append(line)
 
-    return result_string
+    # One join instead of growing a string line by line
+    parts.append("")
+    return "\n".join(parts)
   
   
 def market_data_to_string_for_symbol(market_data: Dict[str, Any], symbol: str) -> str:
   """Format a single symbol's market data to a concise, readable string."""
 
   def _fmt_series(series, decimals=3):
-    cleaned = []
-    for v in series or []:
-      if v is None:
-        continue
-      if isinstance(v, float) and math.isnan(v):
-        continue
-      cleaned.append(f"{v:.{decimals}f}")
-    return ', '.join(cleaned)
-
-  freq_map = {
-      '1m': '1-minute',
-      '3m': '3-minute',
-      '5m': '5-minute',
-      '15m': '15-minute',
-      '30m': '30-minute',
-      '1h': 'hourly',
-      '4h': '4-hour',
-      '1d': 'daily'
-  }
+    # One %-format call over the whole array instead of an f-string per value
+    values = np.asarray(series if series is not None else [], dtype=np.float64)
+    values = values[~np.isnan(values)]
+    return ', '.join([f"%.{decimals}f"] * len(values)) % tuple(values)
 
   symbol_upper = str(symbol).upper()
   intraday = market_data or {}
   frequency = intraday.get('frequency', '3m')
-  interval_desc = freq_map.get(frequency, frequency)
+  interval_desc = _FREQ_MAP.get(frequency, frequency)
 
   price = intraday.get('current_price')
   ema20 = intraday.get('current_close_20_ema')
@@ -136,7 +136,124 @@ def market_data_to_string_for_symbol(market_data: Dict[str, Any], symbol: str) -
 
   return "\n".join(lines)
 
-def trade_decision_provider(market_data_dict: Dict[str, Dict[str, Any]], portfolio_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+# Static instructions sent as the system message. Kept byte-identical across calls
+# (no interpolated data) so the API's prefix cache can reuse it.
+SYSTEM_PROMPT = '''
+You are a trading agent. You receive market data for one or more symbols, each block tagged with its id in brackets, followed by the current portfolio information.
+
+INSTRUCTIONS:
+
+Generate one trading decision for every symbol block.
+the quantity should be within 30% of the total available cash.
+Generate a single JSON object keyed by block id ("1", "2", ...), each mapping to an object in the following structure:
+{
+"trade_signal_args": {
+"coin": <string>,
+"signal": <"buy" | "sell" | "hold" | "close">,
+"quantity": <number>,
+"profit_target": <number>,
+"stop_loss": <number>,
+"invalidation_condition": <string>,
+"leverage": <number>,
+"confidence": <number: between 0 and 1>,
+"risk_usd": <number>,
+"entry_price": <number>
+}
+If you have no trading signal for a symbol, set "signal" to "hold" and all numeric fields sensibly, matching the example below.
+Respond ONLY with your answer json, no text or explanation.
+Here is an example for a single block:
+{"1": {'trade_signal_args': {'coin': 'BTC', 'signal': 'hold', 'quantity': 0.0, 'profit_target': 125324.72, 'stop_loss': 103010.63, 'invalidation_condition': 'If the price closes below {stop_loss:.2f} on a 3-minute candle', 'leverage': 10, 'confidence': 0.78, 'risk_usd': 782.6279043220959, 'entry_price': 109750.0}}}
+Do not output an array. Always output a dict keyed by block id as in the example above.
+'''
+
+# Per-call user message; only these few fields change between ticks
+_MARKET_PROMPT_FMT = '''
+Here is the market data for {n} symbols, each block tagged with its id in brackets:
+{md_str}
+Here is the current portfolio information:
+{pf_str}
+
+now pleae generate one trading decision for every symbol block above.
+Generate a single JSON object with exactly the keys {ids}, one per block id.
+'''
+
+_client = None
+
+# Replies cached by prompt fingerprint for one candle period: {key: (expires_at, decisions)}
+_response_cache: Dict[str, Any] = {}
+
+_FREQ_UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+def _candle_seconds(frequency: str) -> int:
+    """Length of one candle for a kline frequency like '3m' or '1h' (180s if unknown)"""
+    try:
+        return int(frequency[:-1]) * _FREQ_UNIT_SECONDS[frequency[-1]]
+    except (KeyError, ValueError, IndexError, TypeError):
+        return 180
+
+
+def _get_client():
+    """OpenAI-compatible DeepSeek client, created once and reused across calls"""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(
+            api_key=DEEPSEEK_API_KEY,
+            base_url="https://api.deepseek.com"
+        )
+    return _client
+
+
+def _prepare_request(market_data_dict: Dict[str, Dict[str, Any]], portfolio_json: Dict[str, Any],
+                     symbols: List[str]) -> Tuple[str, List[Dict[str, str]]]:
+    """Cache key and chat messages for one batched decision request"""
+    # One numbered block per symbol so every decision maps back by index
+    md_str = "\n\n".join(
+        f"[{i}] {market_data_to_string_for_symbol(market_data_dict[symbol], symbol)}"
+        for i, symbol in enumerate(symbols, 1)
+    )
+    pf_str = portfolio_to_string(portfolio_json)
+
+    # The formatted text is already rounded to display precision, so it doubles as a
+    # quantized cache key; only the "As of" timestamp is left out
+    timestamp = (portfolio_json or {}).get('timestamp')
+    fingerprint = md_str + (pf_str.replace(f"As of: {timestamp}\n", "", 1) if timestamp else pf_str)
+    key = hashlib.blake2b(fingerprint.encode(), digest_size=16).hexdigest()
+
+    ids = ", ".join(f'"{i}"' for i in range(1, len(symbols) + 1))
+    MARKET_PROMPT = _MARKET_PROMPT_FMT.format(n=len(symbols), md_str=md_str, pf_str=pf_str, ids=ids)
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": MARKET_PROMPT},
+    ]
+    return key, messages
+
+
+def _cached_decisions(key: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Decisions stored under key if they have not expired yet"""
+    cached = _response_cache.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return dict(cached[1])
+    return None
+
+
+def _store_decisions(key: str, content: str, symbols: List[str],
+                     market_data_dict: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Parse the model reply, map it to symbols and cache it until the current candle closes"""
+    # The model's JSON output is accessible as a Python dict
+    result = orjson.loads(content)
+    decisions = _decisions_by_symbol(result, symbols)
+
+    now = time.monotonic()
+    for stale in [k for k, (expires_at, _) in _response_cache.items() if expires_at <= now]:
+        del _response_cache[stale]
+    frequency = (market_data_dict[symbols[0]] or {}).get('frequency', '3m')
+    _response_cache[key] = (now + _candle_seconds(frequency), decisions)
+    return dict(decisions)
+
+
+def trade_decision_provider(market_data_dict: Dict[str, Dict[str, Any]], portfolio_json: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
     """
     Generate trading decisions for all symbols based on market data and portfolio
     
@@ -145,62 +262,38 @@ def trade_decision_provider(market_data_dict: Dict[str, Dict[str, Any]], portfol
         portfolio_json: Portfolio JSON data from SimplePortfolio.return_json()
     
     Returns:
-        List of decision objects, one per symbol
+        Dict of decision objects keyed by symbol (one LLM call for all symbols)
     """
-    decisions = {}
-    for symbol, market_data in (market_data_dict or {}).items():
-        md_str = market_data_to_string_for_symbol(market_data, symbol)
-        pf_str = portfolio_to_string(portfolio_json, symbol)
-
-        MARKET_PROMPT = f'''
-        You are a trading agent. Here is the market data for {symbol}:
-        {md_str}
-        Here is the current portfolio information:
-        {pf_str}
-        
-        INSTRUCTIONS:
-        
-        now pleae generate a trading decision for the symbol {symbol}
-        the quantity should be within 30% of the total available cash.
-        Generate ONLY for symbol {symbol} a single JSON object in the following structure:
-        {{
-        "trade_signal_args": {{
-        "coin": <string>,
-        "signal": <"buy" | "sell" | "hold" | "close">,
-        "quantity": <number>,
-        "profit_target": <number>,
-        "stop_loss": <number>,
-        "invalidation_condition": <string>,
-        "leverage": <number>,
-        "confidence": <number: between 0 and 1>,
-        "risk_usd": <number>,
-        "entry_price": <number>
-        }}
-        If you have no trading signal, set "signal" to "hold" and all numeric fields sensibly, matching the example below.
-        Respond ONLY with your answer json, no text or explanation.
-        Here is an example:
-        {{'trade_signal_args': {{'coin': 'BTC', 'signal': 'hold', 'quantity': 0.0, 'profit_target': 125324.72, 'stop_loss': 103010.63, 'invalidation_condition': 'If the price closes below {{stop_loss:.2f}} on a 3-minute candle', 'leverage': 10, 'confidence': 0.78, 'risk_usd': 782.6279043220959, 'entry_price': 109750.0}}}}\n"
-        Do not output an array. Always output a dict for a single symbol as in the example above.
-        '''
+    symbols = list(market_data_dict or {})
+    if not symbols:
+        return {}
 
-        from openai import OpenAI
+    key, messages = _prepare_request(market_data_dict, portfolio_json, symbols)
+    cached = _cached_decisions(key)
+    if cached is not None:
+        return cached
 
-        # Initialize client
-        client = OpenAI(
-            api_key=DEEPSEEK_API_KEY,
-            base_url="https://api.deepseek.com"
-        )
+    # One chat completion for all symbols, returning structured JSON
+    response = _get_client().chat.completions.create(
+        model="deepseek-chat",
+        messages=messages,
+        response_format={"type": "json_object"}  # Ensures valid JSON
+    )
+    return _store_decisions(key, response.choices[0].message.content, symbols, market_data_dict)
 
-        # Create a chat completion that returns structured JSON
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[{"role": "user", "content": MARKET_PROMPT}],
-            response_format={"type": "json_object"}  # Ensures valid JSON
-        )
-
-        # The model's JSON output is accessible as a Python dict
-        result = json.loads(response.choices[0].message.content)
-        decisions[symbol] = result
 
+def _decisions_by_symbol(result: Dict[str, Any], symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Map a batched reply keyed by block id ("1", "2", ...) back to its symbols"""
+    if not isinstance(result, dict):
+        raise ValueError(f"Expected a JSON object keyed by block id, got {type(result).__name__}")
+    if len(result) != len(symbols):
+        raise ValueError(f"Expected {len(symbols)} decisions, got {len(result)}")
+    try:
+        decisions = {symbol: result[str(i)] for i, symbol in enumerate(symbols, 1)}
+    except KeyError as e:
+        raise ValueError(f"Missing decision for block {e}") from None
+    # Reject malformed entries here, before display and execution index into them
+    for symbol, decision in decisions.items():
+        if not isinstance(decision, dict) or not isinstance(decision.get('trade_signal_args'), dict):
+            raise ValueError(f"Malformed decision for {symbol}: {decision!r}")
     return decisions
-